@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    Seat, Booking, Payment, Ticket, ShowSeatPricing, BookedSeat
+    Seat, Booking, Payment, Ticket, ShowSeatPricing, BookedSeat, SeatHold
 )
 
 
@@ -41,8 +41,8 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ('ticket_code', 'booking', 'seat', 'show', 'issued_at')
-    list_filter = ('issued_at',)
+    list_display = ('ticket_code', 'booking', 'seat', 'show', 'issued_at', 'qr_status')
+    list_filter = ('issued_at', 'qr_status')
     search_fields = ('ticket_code', 'booking__id', 'seat__seat_number', 'show__movie__title')
     autocomplete_fields = ['booking', 'seat', 'show']
 
@@ -53,3 +53,11 @@ class BookedSeatAdmin(admin.ModelAdmin):
     list_filter = ('show__movie', 'show__screen__theater')
     search_fields = ('seat__seat_number', 'show__movie__title', 'booking__user__username')
     autocomplete_fields = ['seat', 'show', 'booking']
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ('booking', 'expires_at')
+    search_fields = ('booking__id', 'booking__user__username')
+    ordering = ('expires_at',)
+    autocomplete_fields = ['booking']
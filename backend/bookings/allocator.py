@@ -0,0 +1,255 @@
+"""
+Per-show seat allocator.
+
+With ``BOOKING_ENGINE = 'allocator'`` bookings and cancellations for a show
+are handed to that show's allocator: one worker thread that owns the show's
+taken seats in memory and processes commands in arrival order. Competing
+requests for a hot show are decided in memory instead of queueing on row
+locks, and the bookings it accepts are written together, up to
+``BOOKING_ALLOCATOR_BATCH_SIZE`` per transaction. An allocator retires after
+``BOOKING_ALLOCATOR_IDLE`` seconds without work. Each allocator holds a
+database connection, so at most ``BOOKING_ALLOCATOR_MAX`` run at once; shows
+past that book and cancel through the locking engine instead.
+
+Allocators only order the bookings of this process; the ``(show, seat)``
+unique constraint still decides between processes.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils.timezone import now
+
+from . import availability
+from .engine import (
+    AllocatorBusy, SeatConflict, _cancel, _claim, _create_locking, _taken_seat_numbers, is_transient, total_price,
+)
+from .models import Booking, BookedSeat, SeatHold
+
+logger = logging.getLogger(__name__)
+
+Book = namedtuple('Book', 'user show seats prices future')
+Cancel = namedtuple('Cancel', 'booking future')
+
+# Queued to make an allocator exit
+STOP = None
+# Returned by _submit when BOOKING_ALLOCATOR_MAX allocators are already running
+FULL = object()
+
+
+class ShowAllocator(threading.Thread):
+
+    def __init__(self, show_id):
+        super().__init__(name=f'seat-allocator-{show_id}', daemon=True)
+        self.show_id = show_id
+        self.commands = queue.Queue()
+        # Ids of booked or held seats, loaded on first use
+        self.taken = None
+
+    def run(self):
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._process(batch)
+        finally:
+            connection.close()
+
+    def _next_batch(self):
+        idle = getattr(settings, 'BOOKING_ALLOCATOR_IDLE', 60)
+        batch_size = getattr(settings, 'BOOKING_ALLOCATOR_BATCH_SIZE', 50)
+        try:
+            command = self.commands.get(timeout=idle)
+        except queue.Empty:
+            with _lock:
+                # Nothing can be queued once we are out of the registry
+                if self.commands.empty():
+                    _allocators.pop(self.show_id, None)
+                    return None
+            command = self.commands.get_nowait()
+
+        batch = []
+        while command is not STOP:
+            # Callers that gave up waiting cancel their command
+            if command.future.set_running_or_notify_cancel():
+                batch.append(command)
+            if len(batch) >= batch_size:
+                return batch
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return batch
+        if batch:
+            self._process(batch)
+        return None
+
+    def _process(self, batch):
+        accepted = []
+        reloaded = False
+        for command in batch:
+            if isinstance(command, Cancel):
+                # Bookings ahead of the cancellation are written first
+                self._flush(accepted)
+                accepted = []
+                self._run(command.future, self._cancel, command.booking)
+                continue
+
+            seat_ids = {seat.id for seat in command.seats}
+            taken = self._taken(accepted)
+            if not taken.isdisjoint(seat_ids) and not reloaded:
+                # Seats may have been released by hold expiry or another process
+                self.taken = None
+                taken = self._taken(accepted)
+                reloaded = True
+            if taken.isdisjoint(seat_ids):
+                taken.update(seat_ids)
+                accepted.append(command)
+            else:
+                command.future.set_exception(SeatConflict(
+                    [seat.seat_number for seat in command.seats if seat.id in taken]
+                ))
+        self._flush(accepted)
+
+    def _taken(self, accepted):
+        if self.taken is None:
+            self.taken = set(BookedSeat.objects.filter(show_id=self.show_id).values_list('seat_id', flat=True))
+            # Accepted but not yet written
+            self.taken.update(seat.id for command in accepted for seat in command.seats)
+        return self.taken
+
+    def _flush(self, accepted):
+        if not accepted:
+            return
+        try:
+            bookings = self._retry(self._insert, accepted)
+        except IntegrityError:
+            # Another process booked some of these seats; claim one at a time
+            self.taken = None
+            for command in accepted:
+                self._run(command.future, self._claim, command)
+            return
+        except Exception as e:
+            logger.exception("Seat allocator for show %s failed to write %d bookings", self.show_id, len(accepted))
+            self.taken = None
+            for command in accepted:
+                command.future.set_exception(e)
+            return
+        for command, booking in zip(accepted, bookings):
+            command.future.set_result(booking)
+
+    def _insert(self, accepted):
+        with transaction.atomic():
+            bookings = [
+                Booking(user=command.user, show=command.show, total_price=total_price(command.seats, command.prices))
+                for command in accepted
+            ]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Booking.objects.bulk_create(bookings)
+            else:
+                for booking in bookings:
+                    booking.save()
+
+            pairs = [(booking, seat) for booking, command in zip(bookings, accepted) for seat in command.seats]
+            BookedSeat.objects.bulk_create([
+                BookedSeat(show_id=self.show_id, seat=seat, booking=booking) for booking, seat in pairs
+            ])
+            Booking.seats.through.objects.bulk_create([
+                Booking.seats.through(booking_id=booking.id, seat_id=seat.id) for booking, seat in pairs
+            ])
+            expires_at = now() + settings.SEAT_HOLD_TTL
+            SeatHold.objects.bulk_create([SeatHold(booking=booking, expires_at=expires_at) for booking in bookings])
+
+            seat_ids = [seat.id for _, seat in pairs]
+            transaction.on_commit(partial(availability.mark_held, self.show_id, seat_ids))
+        return bookings
+
+    def _claim(self, command):
+        try:
+            with transaction.atomic():
+                return _claim(command.user, command.show, command.seats, command.prices)
+        except IntegrityError:
+            raise SeatConflict(_taken_seat_numbers(command.show, [seat.id for seat in command.seats]))
+
+    def _cancel(self, booking):
+        seat_ids = _cancel(booking)
+        if self.taken is not None:
+            self.taken.difference_update(seat_ids)
+        return seat_ids
+
+    def _retry(self, func, *args):
+        attempts = getattr(settings, 'BOOKING_RETRY_ATTEMPTS', 3)
+        backoff = getattr(settings, 'BOOKING_RETRY_BACKOFF', 0.01)
+        for attempt in range(attempts + 1):
+            try:
+                return func(*args)
+            except OperationalError as e:
+                if not is_transient(e) or attempt == attempts:
+                    raise
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    @staticmethod
+    def _run(future, func, *args):
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+
+_lock = threading.Lock()
+_allocators = {}
+
+
+def _submit(show_id, command):
+    """Queue ``command`` and wait for its outcome, or return ``FULL``."""
+    with _lock:
+        allocator = _allocators.get(show_id)
+        if allocator is None:
+            if len(_allocators) >= getattr(settings, 'BOOKING_ALLOCATOR_MAX', 8):
+                return FULL
+            allocator = _allocators[show_id] = ShowAllocator(show_id)
+            allocator.start()
+        allocator.commands.put(command)
+
+    timeout = getattr(settings, 'BOOKING_ALLOCATOR_TIMEOUT', 10)
+    try:
+        return command.future.result(timeout=timeout)
+    except TimeoutError:
+        # Already being processed: the outcome is only moments away
+        if not command.future.cancel():
+            return command.future.result()
+        raise AllocatorBusy(show_id) from None
+
+
+def book(user, show, seats, prices):
+    """Queue a booking on the show's allocator and wait for the outcome."""
+    booking = _submit(show.id, Book(user, show, list(seats), prices, Future()))
+    if booking is FULL:
+        return _create_locking(user, show, seats)
+    return booking
+
+
+def cancel(booking):
+    """Queue a cancellation on the show's allocator and wait for it."""
+    seat_ids = _submit(booking.show_id, Cancel(booking, Future()))
+    if seat_ids is FULL:
+        return _cancel(booking)
+    return seat_ids
+
+
+def stop_all(timeout=None):
+    """Stop every allocator once its queued commands are done."""
+    with _lock:
+        allocators = list(_allocators.values())
+        _allocators.clear()
+    for allocator in allocators:
+        allocator.commands.put(STOP)
+    for allocator in allocators:
+        allocator.join(timeout)
@@ -0,0 +1,405 @@
+import hashlib
+import json
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.shortcuts import get_object_or_404
+from django.utils.timezone import localtime
+
+from theaters.layout import CODE_SEAT_TYPES, NO_SEAT, SEAT_TYPE_CODES, LayoutError, layout_from_seats, row_label
+from theaters.models import ScreenLayout, Show
+from . import events
+from .models import Seat, BookedSeat, ShowSeatPricing
+
+# ---------------------- STATES ----------------------
+
+FREE = 0
+BOOKED = 1
+HELD = 2  # booked but still waiting for payment
+
+# One character per seat in the seat map rows
+STATE_CODES = {FREE: '.', BOOKED: 'x', HELD: 'h'}
+STATE_LEGEND = {'.': 'free', 'h': 'held', 'x': 'booked', NO_SEAT: 'no seat'}
+STATE_EVENTS = {FREE: 'released', BOOKED: 'booked', HELD: 'held'}
+
+# Best available seats: blocks near the middle column and about two thirds of
+# the way back score best; ROW_WEIGHT trades row distance against centering.
+BEST_ROW = 2 / 3
+ROW_WEIGHT = 1.0
+
+NO_PRICE = Decimal('0.00')
+
+
+# ---------------------- AVAILABILITY ----------------------
+
+class ScreenSeating:
+    """
+    Seats of a screen as ``(id, seat_number, seat_type, row, column)`` tuples,
+    shared by every show on that screen. Order and grid positions come from
+    the screen's ``ScreenLayout``; screens without one get a layout derived
+    from their seat numbers, or no grid at all if that is not possible.
+
+    Older data has several ``Seat`` rows per seat number. The lowest id is
+    the seat that is offered; ``duplicates`` lists the other ids under it and
+    ``positions`` maps them to the same position, so bookings made through
+    any of them count.
+    """
+    __slots__ = ('screen_id', 'rows', 'columns', 'aisles', 'seats', 'duplicates', 'positions', 'cells', 'segments',
+                 'built_at')
+
+    def __init__(self, screen_id, layout, seats, duplicates=None):
+        self.screen_id = screen_id
+        self.rows = layout.rows if layout else None
+        self.columns = layout.columns if layout else None
+        self.aisles = layout.aisles if layout else []
+        self.seats = seats
+        self.positions = {seat[0]: pos for pos, seat in enumerate(seats)}
+        self.duplicates = {seat_id: ids for seat_id, ids in (duplicates or {}).items() if seat_id in self.positions}
+        for seat_id, ids in self.duplicates.items():
+            for duplicate_id in ids:
+                self.positions[duplicate_id] = self.positions[seat_id]
+        # Row-major grid index of every seat, used to draw the seat map
+        self.cells = [row * self.columns + column for _, _, _, row, column in seats] if layout else None
+        # (start, end) position ranges of side-by-side seats, split at gaps and aisles
+        self.segments = _segments(seats, set(self.aisles)) if layout else []
+        self.built_at = time.monotonic()
+
+    @property
+    def has_grid(self):
+        return self.rows is not None
+
+    def canonical_id(self, seat_id):
+        """Id of the offered seat that ``seat_id`` stands for."""
+        return self.seats[self.positions[seat_id]][0]
+
+
+def _segments(seats, aisles):
+    segments = []
+    start = 0
+    for pos in range(1, len(seats) + 1):
+        if pos < len(seats):
+            _, _, _, row, column = seats[pos]
+            _, _, _, prev_row, prev_column = seats[pos - 1]
+            if row == prev_row and column == prev_column + 1 and prev_column not in aisles:
+                continue
+        segments.append((start, pos))
+        start = pos
+    return segments
+
+
+class ShowAvailability:
+    """
+    Seat availability for a single show.
+
+    Seats of the show's screen are kept in a fixed order and their state lives
+    in a bytearray indexed by that position, so marking seats booked/free is an
+    in-place write and listing free seats never touches the database.
+    """
+    __slots__ = ('show_id', 'show', 'seating', 'prices', 'state', 'version', 'encoded', 'built_at')
+
+    def __init__(self, show_id, show, seating, prices, seat_states):
+        self.show_id = show_id
+        self.show = show
+        self.seating = seating
+        self.prices = prices
+        self.state = bytearray(len(seating.seats))
+        self.version = 0
+        self.encoded = None
+        self.built_at = time.monotonic()
+        positions = seating.positions
+        for seat_id, value in seat_states:
+            pos = positions.get(seat_id)
+            if pos is not None:
+                self.state[pos] = value
+
+    @property
+    def screen_id(self):
+        return self.seating.screen_id
+
+    def mark(self, seat_ids, value):
+        positions = self.seating.positions
+        for seat_id in seat_ids:
+            pos = positions.get(seat_id)
+            if pos is not None:
+                self.state[pos] = value
+        self.version += 1
+
+    def price(self, seat_type):
+        # Decimal strings, like every other price in the API
+        return str(self.prices.get(seat_type, NO_PRICE))
+
+    def available_seats(self):
+        state = self.state
+        screen_id = self.seating.screen_id
+        return [
+            {
+                'id': seat_id,
+                'seat_number': seat_number,
+                'seat_type': seat_type,
+                'screen': screen_id,
+                'price': self.price(seat_type),
+            }
+            for pos, (seat_id, seat_number, seat_type, _, _) in enumerate(self.seating.seats)
+            if state[pos] == FREE
+        ]
+
+    def best_block(self, count, seat_type=None):
+        """
+        Return the positions of the best ``count`` side-by-side free seats,
+        optionally all of ``seat_type``, or ``None`` if there is no such block.
+        Needs a seat grid. Each run of free seats is scored once, at the
+        window closest to the middle, so this is a single pass over the seats.
+        """
+        seating = self.seating
+        seats, state = seating.seats, self.state
+        middle = (seating.columns - 1) / 2
+        ideal_row = (seating.rows - 1) * BEST_ROW
+        best_score, best_first = None, None
+
+        for start, end in seating.segments:
+            run = start
+            for pos in range(start, end + 1):
+                if pos < end and state[pos] == FREE and (seat_type is None or seats[pos][2] == seat_type):
+                    continue
+                if pos - run >= count:
+                    offset = round(middle - (count - 1) / 2 - seats[run][4])
+                    first = run + min(max(offset, 0), pos - run - count)
+                    center = seats[first][4] + (count - 1) / 2
+                    score = (abs(center - middle) / seating.columns
+                             + ROW_WEIGHT * abs(seats[first][3] - ideal_row) / seating.rows)
+                    if best_score is None or score < best_score:
+                        best_score, best_first = score, first
+                run = pos + 1
+
+        if best_first is None:
+            return None
+        return range(best_first, best_first + count)
+
+    def best_seats(self, count, seat_type=None):
+        """Seats of ``best_block`` in the ``available_seats`` format, or ``None``."""
+        block = self.best_block(count, seat_type)
+        if block is None:
+            return None
+        seats = self.seating.seats
+        return [
+            {
+                'id': seats[pos][0],
+                'seat_number': seats[pos][1],
+                'seat_type': seats[pos][2],
+                'screen': self.seating.screen_id,
+                'price': self.price(seats[pos][2]),
+            }
+            for pos in block
+        ]
+
+    def seat_map(self):
+        """
+        Return ``(etag, json_bytes)`` for the show's full seat map. The encoding
+        is cached until the seat state changes, and the ETag is a hash of the
+        content so every process hands out the same one.
+        """
+        version, encoded = self.version, self.encoded
+        if encoded is not None and encoded[0] == version:
+            return encoded[1], encoded[2]
+
+        seating = self.seating
+        columns = seating.columns
+        types = bytearray(NO_SEAT.encode() * (seating.rows * columns))
+        states = bytearray(types)
+        for pos, cell in enumerate(seating.cells):
+            types[cell] = ord(SEAT_TYPE_CODES[seating.seats[pos][2]])
+            states[cell] = ord(STATE_CODES[self.state[pos]])
+
+        rows = []
+        pos = 0
+        for row in range(seating.rows):
+            row_types = types[row * columns:(row + 1) * columns]
+            seats_in_row = len(row_types) - row_types.count(NO_SEAT.encode())
+            rows.append({
+                'label': row_label(row),
+                'types': row_types.decode(),
+                'state': states[row * columns:(row + 1) * columns].decode(),
+                'seat_ids': [seat[0] for seat in seating.seats[pos:pos + seats_in_row]],
+            })
+            pos += seats_in_row
+
+        content = json.dumps({
+            'show': self.show,
+            'prices': {seat_type: str(price) for seat_type, price in self.prices.items()},
+            'columns': columns,
+            'aisles': seating.aisles,
+            'rows': rows,
+            'available': self.state.count(FREE),
+            'legend': {'types': CODE_SEAT_TYPES, 'state': STATE_LEGEND},
+        }, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        self.encoded = (version, etag, content)
+        return etag, content
+
+    def is_stale(self):
+        return _is_stale(self.built_at)
+
+
+def _is_stale(built_at):
+    ttl = getattr(settings, 'SEAT_AVAILABILITY_TTL', 30)
+    return time.monotonic() - built_at > ttl
+
+
+_lock = threading.Lock()
+_screens = {}
+_shows = {}
+# Seat changes seen while a show is being built, one list per build in progress
+_building = {}
+
+
+def _build_seating(screen_id):
+    layout = ScreenLayout.objects.filter(screen_id=screen_id).first()
+    rows = list(Seat.objects.filter(screen_id=screen_id).order_by('id').values_list('id', 'seat_number', 'seat_type'))
+
+    # Lowest id wins where older data has duplicate seat numbers
+    seats_by_number = {}
+    duplicates = {}
+    for seat in rows:
+        canonical = seats_by_number.setdefault(seat[1], seat)
+        if canonical is not seat:
+            duplicates.setdefault(canonical[0], []).append(seat[0])
+
+    if layout is None:
+        try:
+            grid_rows, columns, seat_types = layout_from_seats(
+                (seat_number, seat_type) for _, seat_number, seat_type in seats_by_number.values()
+            )
+            layout = ScreenLayout(screen_id=screen_id, rows=grid_rows, columns=columns, seat_types=seat_types)
+        except LayoutError:
+            return ScreenSeating(screen_id, None, [(*seat, None, None) for seat in seats_by_number.values()],
+                                 duplicates)
+
+    seats = [
+        (seats_by_number[position.seat_number][0], position.seat_number, position.seat_type,
+         position.row, position.column)
+        for position in layout.seat_positions()
+        if position.seat_number in seats_by_number
+    ]
+    return ScreenSeating(screen_id, layout, seats, duplicates)
+
+
+def get_seating(screen_id):
+    seating = _screens.get(screen_id)
+    if seating is None or _is_stale(seating.built_at):
+        seating = _build_seating(screen_id)
+        with _lock:
+            _screens[screen_id] = seating
+    return seating
+
+
+def _build(show_id):
+    show = get_object_or_404(
+        Show.objects.select_related('movie', 'screen__theater').only(
+            'id', 'show_time', 'screen__name', 'screen__theater__name', 'screen__theater__location',
+            'movie__title', 'movie__language', 'movie__duration',
+        ),
+        pk=show_id,
+    )
+    prices = dict(
+        ShowSeatPricing.objects.filter(show_id=show_id).values_list('seat_type', 'price')
+    )
+    # Seats of bookings still waiting for payment are held, the rest booked
+    seat_states = [
+        (seat_id, HELD if status == 'pending' else BOOKED)
+        for seat_id, status in BookedSeat.objects.filter(show_id=show_id).values_list('seat_id', 'booking__status')
+    ]
+    metadata = {
+        'id': show.id,
+        'show_time': localtime(show.show_time),
+        'movie': {'id': show.movie_id, 'title': show.movie.title, 'language': show.movie.language,
+                  'duration': show.movie.duration},
+        'screen': {'id': show.screen_id, 'name': show.screen.name},
+        'theater': {'id': show.screen.theater_id, 'name': show.screen.theater.name,
+                    'location': show.screen.theater.location},
+    }
+    return ShowAvailability(show_id, metadata, get_seating(show.screen_id), prices, seat_states)
+
+
+def get_availability(show_id):
+    """
+    Return the cached availability for a show, building it on first use.
+
+    Entries are rebuilt after ``SEAT_AVAILABILITY_TTL`` seconds so that writes
+    made by other processes are eventually picked up.
+    """
+    availability = _shows.get(show_id)
+    if availability is None or availability.is_stale():
+        # Changes marked while the database is read are replayed on the new
+        # entry, or they would be lost until it goes stale
+        changes = []
+        with _lock:
+            _building.setdefault(show_id, []).append(changes)
+        try:
+            availability = _build(show_id)
+        except BaseException:
+            with _lock:
+                _stop_building(show_id, changes)
+            raise
+        with _lock:
+            _stop_building(show_id, changes)
+            for seat_ids, value in changes:
+                availability.mark(seat_ids, value)
+            _shows[show_id] = availability
+    return availability
+
+
+def _stop_building(show_id, changes):
+    builds = [build for build in _building[show_id] if build is not changes]
+    if builds:
+        _building[show_id] = builds
+    else:
+        del _building[show_id]
+
+
+def _mark(show_id, seat_ids, value):
+    seat_ids = list(seat_ids)
+    with _lock:
+        availability = _shows.get(show_id)
+        if availability is not None:
+            availability.mark(seat_ids, value)
+            # Watchers only know the offered ids, not their duplicates
+            positions = availability.seating.positions
+            seat_ids = [availability.seating.canonical_id(seat_id) if seat_id in positions else seat_id
+                        for seat_id in seat_ids]
+        for changes in _building.get(show_id, ()):
+            changes.append((seat_ids, value))
+    # Watchers of the show get the same change as a delta
+    events.publish_seat_event(show_id, STATE_EVENTS[value], seat_ids)
+
+
+def mark_held(show_id, seat_ids):
+    _mark(show_id, seat_ids, HELD)
+
+
+def mark_booked(show_id, seat_ids):
+    _mark(show_id, seat_ids, BOOKED)
+
+
+def mark_released(show_id, seat_ids):
+    _mark(show_id, seat_ids, FREE)
+
+
+def invalidate(show_id):
+    with _lock:
+        _shows.pop(show_id, None)
+
+
+def invalidate_screen(screen_id):
+    with _lock:
+        _screens.pop(screen_id, None)
+        for show_id in [k for k, v in _shows.items() if v.screen_id == screen_id]:
+            del _shows[show_id]
+
+
+def invalidate_all():
+    with _lock:
+        _shows.clear()
+        _screens.clear()
@@ -0,0 +1,269 @@
+"""
+Synthetic load for the booking hot paths.
+
+``seed_dataset`` bulk-loads theaters, screens, layouts, seats, shows and users (no
+signals, a handful of INSERTs per table) and ``run_scenario`` drives one
+endpoint with concurrent simulated users through the full middleware stack.
+Used by the ``benchmark`` management command.
+"""
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bookmyshow.metrics import registry
+from movies.models import Movie
+from theaters.layout import SEAT_TYPE_CODES, encode_runs
+from theaters.models import Theater, Screen, ScreenLayout, Show
+from . import availability
+from .models import Booking, Seat, ShowSeatPricing
+
+User = get_user_model()
+
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+}
+
+SEAT_ROWS = (('A', 'vip'), ('B', 'regular'), ('C', 'regular'), ('D', 'premium'))
+SEAT_PRICES = {'vip': 350, 'regular': 200, 'premium': 500}
+BATCH_SIZE = 2000
+
+
+class Dataset:
+    def __init__(self, users, show_ids, seats_by_screen, screen_by_show):
+        self.users = users
+        self.show_ids = show_ids
+        self.seats_by_screen = seats_by_screen
+        self.screen_by_show = screen_by_show
+
+    def seats_for(self, show_id):
+        return self.seats_by_screen[self.screen_by_show[show_id]]
+
+
+def seed_dataset(shows, shows_per_screen=10, screens_per_theater=4, seats_per_row=15,
+                 movies=50, users=200, seed=0):
+    rng = random.Random(seed)
+    start = now()
+
+    owner = User.objects.create_user(username='bench_owner', password='bench', role='theater_owner')
+    User.objects.bulk_create([
+        User(username=f'bench_user_{i}', role='user') for i in range(users)
+    ], batch_size=BATCH_SIZE)
+
+    movie_objs = Movie.objects.bulk_create([
+        Movie(
+            title=f'Bench Movie {i}', slug=f'bench-movie-{i}', description='Benchmark movie',
+            language='Hindi', genre='Drama', duration=150, rating=7.5,
+            release_date=start.date(), created_by=owner,
+        )
+        for i in range(movies)
+    ], batch_size=BATCH_SIZE)
+
+    screen_count = max(1, -(-shows // shows_per_screen))
+    theater_count = max(1, -(-screen_count // screens_per_theater))
+    theaters = Theater.objects.bulk_create([
+        Theater(name=f'Bench Theater {i}', slug=f'bench-theater-{i}',
+                location=f'City {i % 20}', created_by=owner)
+        for i in range(theater_count)
+    ], batch_size=BATCH_SIZE)
+    screens = Screen.objects.bulk_create([
+        Screen(theater=theaters[i // screens_per_theater], name=f'Screen {i % screens_per_theater + 1}',
+               slug=f'bench-screen-{i}', created_by=owner)
+        for i in range(screen_count)
+    ], batch_size=BATCH_SIZE)
+
+    row_types = ''.join(SEAT_TYPE_CODES[seat_type] * seats_per_row for _, seat_type in SEAT_ROWS)
+    ScreenLayout.objects.bulk_create((
+        ScreenLayout(screen=screen, rows=len(SEAT_ROWS), columns=seats_per_row, seat_types=encode_runs(row_types))
+        for screen in screens
+    ), batch_size=BATCH_SIZE)
+    Seat.objects.bulk_create((
+        Seat(screen=screen, seat_number=f'{row}{n}', seat_type=seat_type)
+        for screen in screens
+        for row, seat_type in SEAT_ROWS
+        for n in range(1, seats_per_row + 1)
+    ), batch_size=BATCH_SIZE)
+
+    # Shows fall inside the booking window (within 2 days, not yet started)
+    show_objs = Show.objects.bulk_create((
+        Show(screen=screens[i // shows_per_screen], movie=rng.choice(movie_objs),
+             show_time=start + timedelta(minutes=rng.randint(60, 40 * 60)), created_by=owner)
+        for i in range(shows)
+    ), batch_size=BATCH_SIZE)
+
+    ShowSeatPricing.objects.bulk_create((
+        ShowSeatPricing(show=show, seat_type=seat_type, price=price)
+        for show in show_objs
+        for seat_type, price in SEAT_PRICES.items()
+    ), batch_size=BATCH_SIZE)
+
+    seats_by_screen = {}
+    for seat_id, screen_id in Seat.objects.values_list('id', 'screen_id').order_by('id').iterator():
+        seats_by_screen.setdefault(screen_id, []).append(seat_id)
+    screen_by_show = dict(Show.objects.values_list('id', 'screen_id'))
+
+    return Dataset(list(User.objects.filter(role='user')), list(screen_by_show), seats_by_screen, screen_by_show)
+
+
+# ---------------------- LOAD DRIVER ----------------------
+
+class SimulatedUser:
+    def __init__(self, user, dataset, rng):
+        self.client = Client(raise_request_exception=False)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+        self.dataset = dataset
+        self.rng = rng
+
+    def hot_show(self):
+        # Most traffic targets a handful of popular shows
+        shows = self.dataset.show_ids
+        if self.rng.random() < 0.8:
+            return shows[self.rng.randrange(max(1, len(shows) // 100))]
+        return self.rng.choice(shows)
+
+    def pick_seats(self, show_id, count):
+        seats = self.dataset.seats_for(show_id)
+        start = self.rng.randrange(len(seats) - count + 1)
+        return seats[start:start + count]
+
+    def book(self, show_id=None, seats=None):
+        show_id = show_id or self.hot_show()
+        seats = seats or self.pick_seats(show_id, self.rng.randint(1, 4))
+        return self.client.post(
+            reverse('booking-create'), {'show': show_id, 'seats': seats},
+            content_type='application/json', **self.auth,
+        )
+
+    # Each scenario does its untimed setup and returns the request to time
+
+    def seat_map(self):
+        url = reverse('available-seats', args=[self.hot_show()])
+        return lambda: self.client.get(url, **self.auth)
+
+    def movie_list(self):
+        return lambda: self.client.get(reverse('movie-list'))
+
+    def booking_create(self):
+        return self.book
+
+    def booking_contention(self):
+        # Everyone competes for the seats of a single show
+        show_id = self.dataset.show_ids[0]
+        return lambda: self.book(show_id=show_id, seats=self.pick_seats(show_id, self.rng.randint(1, 4)))
+
+    def payment_update(self):
+        booking = self.book(show_id=self.rng.choice(self.dataset.show_ids))
+        if booking.status_code != 201:
+            return None
+        payment = self.client.post(
+            reverse('payment-create'), {'booking': booking.json()['id'], 'payment_method': 'upi'},
+            content_type='application/json', **self.auth,
+        )
+        if payment.status_code != 201:
+            return None
+        url = reverse('payment-update', args=[payment.json()['id']])
+        return lambda: self.client.patch(
+            url, {'status': 'success'}, content_type='application/json', **self.auth,
+        )
+
+
+SCENARIOS = {
+    'seat_map': 'available-seats',
+    'movie_list': 'movie-list',
+    'booking_create': 'booking-create',
+    'booking_contention': 'booking-create',
+    'payment_update': 'payment-update',
+}
+
+
+def reset_bookings():
+    """Drop all bookings so every engine starts from the same seat state."""
+    Booking.objects.all().delete()
+    availability.invalidate_all()
+
+
+def _percentile(samples, p):
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def run_scenario(name, dataset, concurrency, requests, seed=0):
+    registry.reset()
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        simulated = SimulatedUser(dataset.users[index % len(dataset.users)], dataset, rng)
+        prepare = getattr(simulated, name)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                request = prepare()
+                if request is None:
+                    continue
+                start = time.perf_counter()
+                response = request()
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    statuses[response.status_code] += 1
+                    latencies.append(elapsed)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    stats = registry.snapshot().get(SCENARIOS[name], {})
+    completed = sum(statuses.values())
+    return {
+        'endpoint': SCENARIOS[name],
+        'requests': completed,
+        'throughput_rps': round(completed / wall, 1) if wall else 0,
+        'wall_seconds': round(wall, 3),
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50), 2),
+            'p95': round(_percentile(latencies, 95), 2),
+            'p99': round(_percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2) if latencies else 0,
+            'mean': round(statistics.fmean(latencies), 2) if latencies else 0,
+        },
+        'queries': stats.get('queries', {}),
+        'db_time_ms': stats.get('db_time_ms', {}),
+    }
+
+
+def database_info():
+    settings_dict = connection.settings_dict
+    info = {
+        'vendor': connection.vendor,
+        'name': str(settings_dict['NAME']),
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'options': {key: value for key, value in settings_dict['OPTIONS'].items() if key != 'password'},
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            info['journal_mode'] = cursor.fetchone()[0]
+    return info
@@ -0,0 +1,198 @@
+"""
+Booking engines: how a new booking claims its seats.
+
+``BOOKING_ENGINE`` picks one:
+
+* ``'locking'`` locks the requested ``Seat`` rows with ``select_for_update``
+  before inserting, so bookings touching the same seats run one at a time.
+* ``'optimistic'`` takes no locks. It inserts the ``BookedSeat`` rows straight
+  away and treats the ``(show, seat)`` unique constraint as the conflict
+  signal. Transient lock errors (SQLite "database is locked", Postgres
+  deadlocks/serialization failures) are retried with jittered backoff.
+* ``'allocator'`` hands bookings and cancellations to the show's seat
+  allocator (see ``bookings.allocator``), which decides them in memory and
+  writes accepted bookings in batches.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+
+from . import availability
+from .holds import place_hold
+from .models import Booking, BookedSeat, Seat, SeatHold, ShowSeatPricing, Ticket
+
+ENGINES = ('locking', 'optimistic', 'allocator')
+
+# Postgres SQLSTATEs worth retrying: serialization failure, deadlock, lock timeout
+TRANSIENT_PGCODES = {'40001', '40P01', '55P03'}
+
+
+class SeatConflict(Exception):
+    """Some of the requested seats are already booked for the show."""
+
+    def __init__(self, seat_numbers):
+        super().__init__(seat_numbers)
+        self.seat_numbers = seat_numbers
+
+
+class SeatScreenMismatch(Exception):
+    """Some of the requested seats are not on the show's screen."""
+
+    def __init__(self, seat_numbers):
+        super().__init__(seat_numbers)
+        self.seat_numbers = seat_numbers
+
+
+class SeatNotOffered(SeatScreenMismatch):
+    """Some of the requested seats were dropped from the screen's layout."""
+
+
+class AllocatorBusy(Exception):
+    """The show's allocator did not get to the request in time; nothing was written."""
+
+
+def get_engine():
+    return getattr(settings, 'BOOKING_ENGINE', 'locking')
+
+
+def create_booking(user, show, seats, engine=None):
+    """
+    Book ``seats`` for ``user`` and place a seat hold on the pending booking.
+    Raises ``SeatConflict`` or ``SeatScreenMismatch``.
+    """
+    engine = engine or get_engine()
+    # The allocator writes from its own thread, which cannot see rows of a
+    # transaction still open here (e.g. inside tests), so lock instead
+    if engine == 'allocator' and not connection.in_atomic_block:
+        from . import allocator
+        return allocator.book(user, show, _offered_seats(show, seats), _prices(show))
+    if engine == 'optimistic':
+        return _create_optimistic(user, show, seats)
+    return _create_locking(user, show, seats)
+
+
+def cancel_booking(booking, engine=None):
+    """Cancel ``booking``, release its seats and drop its tickets."""
+    engine = engine or get_engine()
+    if engine == 'allocator' and not connection.in_atomic_block:
+        from . import allocator
+        return allocator.cancel(booking)
+    return _cancel(booking)
+
+
+def _offered_seats(show, seats):
+    """
+    Check ``seats`` are offered on the show's screen and return the offered
+    seat rows they stand for, so duplicate seats of older data are booked
+    under one id and the ``(show, seat)`` constraint sees every conflict.
+    """
+    wrong = [seat.seat_number for seat in seats if seat.screen_id != show.screen_id]
+    if wrong:
+        raise SeatScreenMismatch(wrong)
+    # Seats a layout change dropped are kept for old bookings only
+    seating = availability.get_seating(show.screen_id)
+    dropped = [seat.seat_number for seat in seats if seat.id not in seating.positions]
+    if dropped:
+        raise SeatNotOffered(dropped)
+
+    seat_ids = list(dict.fromkeys(seating.canonical_id(seat.id) for seat in seats))
+    # Bookings made through a duplicate before it was folded into its seat
+    duplicate_ids = [duplicate_id for seat_id in seat_ids for duplicate_id in seating.duplicates.get(seat_id, ())]
+    if duplicate_ids:
+        taken = _taken_seat_numbers(show, duplicate_ids)
+        if taken:
+            raise SeatConflict(taken)
+
+    if seat_ids == [seat.id for seat in seats]:
+        return seats
+    offered = Seat.objects.in_bulk(seat_ids)
+    return [offered[seat_id] for seat_id in seat_ids]
+
+
+def _prices(show):
+    return dict(ShowSeatPricing.objects.filter(show=show).values_list('seat_type', 'price'))
+
+
+def total_price(seats, prices):
+    return sum(prices.get(seat.seat_type, 0) for seat in seats)
+
+
+def _taken_seat_numbers(show, seat_ids):
+    return list(
+        BookedSeat.objects.filter(show=show, seat_id__in=seat_ids).values_list('seat__seat_number', flat=True)
+    )
+
+
+def _claim(user, show, seats, prices):
+    """Insert the booking and its seats; IntegrityError means a seat is taken."""
+    booking = Booking.objects.create(user=user, show=show, total_price=total_price(seats, prices))
+    BookedSeat.objects.bulk_create([BookedSeat(show=show, seat=seat, booking=booking) for seat in seats])
+    booking.seats.add(*seats)
+    place_hold(booking)
+
+    # Keep the in-memory seat map in sync once the seats are committed
+    seat_ids = [seat.id for seat in seats]
+    transaction.on_commit(lambda: availability.mark_held(show.id, seat_ids))
+    return booking
+
+
+def _create_locking(user, show, seats):
+    seat_ids = [seat.id for seat in _offered_seats(show, seats)]
+    with transaction.atomic():
+        # Lock seats
+        locked_seats = list(Seat.objects.select_for_update().filter(id__in=seat_ids))
+        prices = _prices(show)
+        try:
+            with transaction.atomic():
+                return _claim(user, show, locked_seats, prices)
+        except IntegrityError:
+            raise SeatConflict(_taken_seat_numbers(show, seat_ids))
+
+
+def is_transient(error):
+    pgcode = getattr(error.__cause__, 'pgcode', None) or getattr(error.__cause__, 'sqlstate', None)
+    if pgcode in TRANSIENT_PGCODES:
+        return True
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def _create_optimistic(user, show, seats):
+    seats = _offered_seats(show, seats)
+    seat_ids = [seat.id for seat in seats]
+    prices = _prices(show)
+    attempts = getattr(settings, 'BOOKING_RETRY_ATTEMPTS', 3)
+    backoff = getattr(settings, 'BOOKING_RETRY_BACKOFF', 0.01)
+
+    for attempt in range(attempts + 1):
+        try:
+            with transaction.atomic():
+                return _claim(user, show, seats, prices)
+        except IntegrityError:
+            taken = _taken_seat_numbers(show, seat_ids)
+            if taken:
+                raise SeatConflict(taken)
+            # The conflicting booking was rolled back (or expired) meanwhile
+        except OperationalError as e:
+            if not is_transient(e) or attempt == attempts:
+                raise
+        time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    raise SeatConflict(_taken_seat_numbers(show, seat_ids))
+
+
+def _cancel(booking):
+    with transaction.atomic():
+        booking.is_cancelled = True
+        booking.status = 'cancelled_user'
+        booking.save()
+        SeatHold.objects.filter(booking=booking).delete()
+
+        # Release seats
+        seat_ids = list(BookedSeat.objects.filter(booking=booking).values_list('seat_id', flat=True))
+        BookedSeat.objects.filter(booking=booking).delete()
+        Ticket.objects.filter(booking=booking).delete()
+        transaction.on_commit(lambda: availability.mark_released(booking.show_id, seat_ids))
+    return seat_ids
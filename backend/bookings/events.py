@@ -0,0 +1,182 @@
+"""
+Seat availability events for live seat maps.
+
+Booking, payment, cancellation and hold expiry publish ``held``, ``booked``
+and ``released`` deltas per show. Watchers subscribe through an async queue
+on the event loop that serves them, so an idle watcher is one queue and one
+suspended coroutine, with no threads and no database work. The broker is
+chosen by ``SEAT_EVENTS['BROKER']``:
+
+* ``InProcessBroker`` only reaches watchers in the publishing process.
+* ``RelayBroker`` sends every event through the ``seat_events_relay``
+  command, a local stand-in for a real broker, so web workers also see events
+  published elsewhere (e.g. by ``expire_holds``).
+"""
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Queue of events for one watcher. If the watcher falls ``queue_size``
+    events behind, the queue is dropped and ``get`` returns ``None`` so the
+    client can resync from the seat map.
+    """
+
+    def __init__(self, broker, channel, queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = None
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan-out to the subscribers of this process. ``publish`` may be called
+    from any thread; delivery is handed to each subscriber's event loop.
+    """
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Must be called from the event loop that will consume the events."""
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel):
+        return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, message):
+        self._fan_out(channel, message)
+
+    def _fan_out(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+
+class RelayBroker(InProcessBroker):
+    """
+    Publishes over UDP to the ``seat_events_relay`` command, which forwards
+    each event to every process that registered with it, including this one.
+    Delivery is best effort, like the rest of the seat event stream.
+    """
+
+    def __init__(self, address=('127.0.0.1', 8765), heartbeat=5, queue_size=256):
+        super().__init__(queue_size=queue_size)
+        self.address = tuple(address)
+        self.heartbeat = heartbeat
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._listener = None
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        try:
+            self._socket.sendto(json.dumps([channel, message]).encode(), self.address)
+        except OSError:
+            logger.warning("Seat event relay at %s:%s is unreachable", *self.address)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='seat-events-relay', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.address[0], 0))
+        sock.settimeout(self.heartbeat)
+        last_heartbeat = 0
+        while True:
+            # Registration expires on the relay unless it is renewed
+            if time.monotonic() - last_heartbeat >= self.heartbeat:
+                try:
+                    sock.sendto(b'SUB', self.address)
+                except OSError:
+                    pass
+                last_heartbeat = time.monotonic()
+            try:
+                data, _ = sock.recvfrom(65536)
+            except (socket.timeout, OSError):
+                continue
+            try:
+                channel, message = json.loads(data)
+            except ValueError:
+                continue
+            self._fan_out(channel, message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'SEAT_EVENTS', {})
+                broker_class = import_string(config.get('BROKER', 'bookings.events.InProcessBroker'))
+                _broker = broker_class(**config.get('OPTIONS', {}))
+    return _broker
+
+
+def show_channel(show_id):
+    return f"show:{show_id}"
+
+
+def publish_seat_event(show_id, event, seat_ids):
+    get_broker().publish(show_channel(show_id), {
+        'show': show_id,
+        'event': event,
+        'seats': list(seat_ids),
+    })
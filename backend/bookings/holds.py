@@ -0,0 +1,57 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import availability
+from .models import Booking, BookedSeat, SeatHold
+
+
+def place_hold(booking):
+    return SeatHold.objects.create(booking=booking, expires_at=now() + settings.SEAT_HOLD_TTL)
+
+
+def _release_in_memory(released):
+    released_by_show = {}
+    for show_id, seat_id in released:
+        released_by_show.setdefault(show_id, []).append(seat_id)
+    for show_id, seat_ids in released_by_show.items():
+        availability.mark_released(show_id, seat_ids)
+
+
+def release_expired_holds(batch_size=500):
+    """
+    Expire pending bookings whose hold deadline has passed.
+
+    Holds are read in deadline order from the ``expires_at`` index, their seats
+    are released in bulk and the bookings are marked ``expired``. Returns the
+    number of bookings expired.
+    """
+    expired = 0
+    while True:
+        with transaction.atomic():
+            booking_ids = list(
+                SeatHold.objects.filter(expires_at__lte=now())
+                .order_by('expires_at')
+                .values_list('booking_id', flat=True)[:batch_size]
+            )
+            if not booking_ids:
+                return expired
+
+            # Bookings paid for in the meantime are no longer pending; skip them
+            pending_ids = list(
+                Booking.objects.select_for_update()
+                .filter(id__in=booking_ids, status='pending')
+                .values_list('id', flat=True)
+            )
+            released = list(
+                BookedSeat.objects.filter(booking_id__in=pending_ids).values_list('show_id', 'seat_id')
+            )
+            BookedSeat.objects.filter(booking_id__in=pending_ids).delete()
+            Booking.objects.filter(id__in=pending_ids).update(status='expired')
+            SeatHold.objects.filter(booking_id__in=booking_ids).delete()
+
+            transaction.on_commit(partial(_release_in_memory, released))
+
+        expired += len(pending_ids)
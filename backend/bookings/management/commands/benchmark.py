@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import subprocess
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils.timezone import now
+
+from bookings.benchmark import SCALES, SCENARIOS, database_info, reset_bookings, run_scenario, seed_dataset
+from bookings import allocator
+from bookings.engine import ENGINES, get_engine
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset in a throwaway test database and load-test the booking hot paths. "
+        "Runs against whatever the default database is configured as (SQLite or Postgres)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k', help="Number of shows to seed")
+        parser.add_argument('--shows', type=int, help="Exact number of shows (overrides --scale)")
+        parser.add_argument('--users', type=int, default=200, help="Simulated user accounts")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent simulated users")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per scenario")
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help="Scenario to run (repeatable, default: all)")
+        parser.add_argument('--engine', action='append', choices=ENGINES,
+                            help="Booking engine to run the scenarios with (repeatable, default: BOOKING_ENGINE)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the benchmark database afterwards")
+
+    def handle(self, *args, **kwargs):
+        shows = kwargs['shows'] or SCALES[kwargs['scale']]
+        scenarios = kwargs['scenario'] or list(SCENARIOS)
+        engines = kwargs['engine'] or [get_engine()]
+
+        if connection.vendor == 'sqlite':
+            # A file database so concurrent users contend like they would in production
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            if not test_settings.get('NAME'):
+                test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'bookmyshow_benchmark.sqlite3')
+
+        if kwargs['verbosity'] < 2:
+            # Conflicts and lock errors are counted in the report, not logged per request
+            logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+        # Like the test runner: no debug query log or technical 500 pages skewing results
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=kwargs['keepdb'])
+        try:
+            self.stdout.write(self.style.WARNING(f"⏳ Seeding {shows} shows..."))
+            dataset = seed_dataset(shows, users=kwargs['users'], seed=kwargs['seed'])
+
+            report = {
+                'meta': {
+                    'timestamp': now().isoformat(),
+                    'commit': self.git_commit(),
+                    'database': database_info(),
+                    'shows': shows,
+                    'concurrency': kwargs['concurrency'],
+                    'requests_per_scenario': kwargs['requests'],
+                    'seed': kwargs['seed'],
+                },
+                'engines': {},
+            }
+            for engine in engines:
+                # Each engine starts from the same, empty seat state
+                reset_bookings()
+                results = report['engines'][engine] = {}
+                with override_settings(BOOKING_ENGINE=engine):
+                    for name in scenarios:
+                        self.stdout.write(self.style.WARNING(f"⏳ Running {name} ({engine})..."))
+                        result = run_scenario(name, dataset, kwargs['concurrency'], kwargs['requests'], kwargs['seed'])
+                        results[name] = result
+                        self.stdout.write(self.style.SUCCESS(
+                            f"✔ {name} ({engine}): {result['throughput_rps']} req/s, "
+                            f"p95 {result['latency_ms']['p95']} ms, statuses {result['status_codes']}"
+                        ))
+                allocator.stop_all()
+        finally:
+            allocator.stop_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=kwargs['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"🎉 Report written to {kwargs['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release seats of unpaid bookings whose hold has expired and mark them expired"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between sweeps")
+        parser.add_argument('--batch-size', type=int, default=500, help="Holds released per transaction")
+        parser.add_argument('--once', action='store_true', help="Run a single sweep and exit")
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs['interval']
+        batch_size = kwargs['batch_size']
+
+        self.stdout.write(self.style.WARNING("⏳ Sweeping expired seat holds..."))
+        try:
+            while True:
+                expired = release_expired_holds(batch_size=batch_size)
+                if expired:
+                    self.stdout.write(self.style.SUCCESS(f"✔ Expired {expired} booking(s)"))
+                if kwargs['once']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\n🛑 Sweeper stopped."))
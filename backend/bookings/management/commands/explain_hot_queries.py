@@ -0,0 +1,110 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.utils.timezone import now
+
+from bookings.models import Booking, BookedSeat, Seat, SeatHold, Ticket
+from movies.models import CastMember, Movie, Review
+from theaters.models import Show, Showtime
+
+# Plan lines that read a whole table: "Seq Scan on <table>" (PostgreSQL) or
+# "SCAN <table>" without an index (SQLite)
+SEQ_SCAN = re.compile(r'Seq Scan on (\w+)|\bSCAN (\w+)(?! USING)(?!.*\bINDEX\b)')
+# Plans that sort instead of reading rows in index order
+SORT = re.compile(r'(?<!Incremental )\bSort\b|TEMP B-TREE FOR ORDER BY')
+
+
+def _samples():
+    """Busiest user, theater, movie and show, so the plans see realistic row counts."""
+    user_id = (Booking.objects.values('user').annotate(n=Count('id')).order_by('-n')
+               .values_list('user', flat=True).first())
+    show = (Show.objects.annotate(n=Count('booked_seats')).order_by('-n')
+            .select_related('screen__theater', 'movie').first())
+    movie = Movie.objects.annotate(n=Count('reviews')).order_by('-n').first()
+    showtime = Showtime.objects.order_by('show_date').first()
+    if user_id is None or show is None or movie is None:
+        raise CommandError("Not enough data to explain against. Run generate_data.py first.")
+    return {
+        'user_id': user_id,
+        'show': show,
+        'movie_slug': movie.slug,
+        'seat_type': Seat.objects.filter(screen_id=show.screen_id).values_list('seat_type', flat=True).first(),
+        'showtime': showtime,
+    }
+
+
+def hot_queries(s):
+    """The queries behind the busiest endpoints, with the filters and ordering the views use."""
+    show = s['show']
+    queries = [
+        ('movie list', Movie.objects.order_by('-release_date', '-id')[:21]),
+        ('movie detail', Movie.objects.filter(slug=s['movie_slug'])),
+        ('cast list', CastMember.objects.order_by('name', 'id')[:21]),
+        ('review list', Review.objects.filter(movie__slug=s['movie_slug'], is_deleted=False)
+            .select_related('user', 'movie').order_by('-created_at', '-id')[:21]),
+        ('theater shows', Show.objects.filter(screen__theater__slug=show.screen.theater.slug, is_deleted=False)),
+        ('booking list', Booking.objects.filter(user_id=s['user_id'], is_cancelled=False).order_by('-created_at')),
+        ('ticket list', Ticket.objects.filter(booking__user_id=s['user_id']).select_related('seat')),
+        ('seat states', BookedSeat.objects.filter(show_id=show.id).values_list('seat_id', 'booking__status')),
+        ('screen seats', Seat.objects.filter(screen_id=show.screen_id).order_by('id')),
+        ('seats by type', Seat.objects.filter(screen_id=show.screen_id, seat_type=s['seat_type'])),
+        ('expired holds', SeatHold.objects.filter(expires_at__lte=now()).order_by('expires_at')[:500]),
+    ]
+    if s['showtime'] is not None:
+        showtime = s['showtime']
+        queries.append(('showtimes in city', Showtime.objects.filter(
+            city=showtime.city, show_date=showtime.show_date).order_by('show_time')))
+    return queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the queries behind the hot endpoints and flag full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to explain against")
+        parser.add_argument('--analyze', action='store_true',
+                            help="Run the queries too and report actual timings (PostgreSQL only)")
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help="Ignore full scans of tables smaller than this (the planner prefers them there)")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not just flagged ones")
+
+    def handle(self, *args, **kwargs):
+        alias = kwargs['database']
+        connection = connections[alias]
+        options = {'analyze': True} if kwargs['analyze'] and connection.vendor == 'postgresql' else {}
+        table_rows = {}
+
+        flagged = 0
+        for name, queryset in hot_queries(_samples()):
+            plan = queryset.using(alias).explain(**options)
+            # Small tables are scanned by design, only big ones are worth an index
+            scans = sorted(
+                table for table in {a or b for a, b in SEQ_SCAN.findall(plan)}
+                if self._row_count(connection, table, table_rows) >= kwargs['min_rows']
+            )
+            sorts = bool(SORT.search(plan))
+
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"⚠ {name}: full scan of {', '.join(scans)}"))
+            elif sorts:
+                self.stdout.write(f"· {name}: sorts its rows instead of reading an index in order")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✔ {name}"))
+            if scans or kwargs['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"\n{flagged} hot queries scan a whole table ({connection.vendor})"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\nNo full table scans ({connection.vendor})"))
+
+    @staticmethod
+    def _row_count(connection, table, cache):
+        if table not in cache:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+                cache[table] = cursor.fetchone()[0]
+        return cache[table]
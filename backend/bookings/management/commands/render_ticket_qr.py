@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from bookings.models import Booking, Ticket
+from bookings.tickets import create_tickets, render_ticket_qr_codes
+
+
+class Command(BaseCommand):
+    help = "Issue and render tickets the background worker did not finish (e.g. after a worker restart)"
+
+    def handle(self, *args, **kwargs):
+        # Paid bookings whose tickets were never created
+        unissued = Booking.objects.filter(
+            payment__status='success', is_cancelled=False, tickets__isnull=True
+        ).values_list('id', flat=True)
+        issued = sum(create_tickets(booking_id) for booking_id in list(unissued))
+
+        booking_ids = Ticket.objects.filter(qr_status='pending').values_list('booking_id', flat=True).distinct()
+
+        rendered = 0
+        for booking_id in list(booking_ids):
+            rendered += render_ticket_qr_codes(booking_id)
+
+        self.stdout.write(self.style.SUCCESS(f"🎉 Issued {issued} ticket(s), rendered {rendered} QR code(s)"))
@@ -0,0 +1,49 @@
+import json
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Relay seat events between processes (local stand-in for a pub/sub broker, used by RelayBroker)"
+
+    def add_arguments(self, parser):
+        options = getattr(settings, 'SEAT_EVENTS', {}).get('OPTIONS', {})
+        host, port = options.get('address', ('127.0.0.1', 8765))
+        parser.add_argument('--host', default=host)
+        parser.add_argument('--port', type=int, default=port)
+        parser.add_argument('--expiry', type=float, default=options.get('heartbeat', 5) * 3,
+                            help="Seconds before a silent subscriber is dropped")
+
+    def handle(self, *args, **kwargs):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((kwargs['host'], kwargs['port']))
+        subscribers = {}
+
+        self.stdout.write(self.style.WARNING(f"📡 Relaying seat events on {kwargs['host']}:{kwargs['port']}..."))
+        try:
+            while True:
+                data, sender = sock.recvfrom(65536)
+                now = time.monotonic()
+                if data == b'SUB':
+                    if sender not in subscribers:
+                        self.stdout.write(f"➕ Subscriber {sender[0]}:{sender[1]}")
+                    subscribers[sender] = now
+                    continue
+
+                try:
+                    json.loads(data)
+                except ValueError:
+                    continue
+                for subscriber, seen in list(subscribers.items()):
+                    if now - seen > kwargs['expiry']:
+                        del subscribers[subscriber]
+                        continue
+                    try:
+                        sock.sendto(data, subscriber)
+                    except OSError:
+                        del subscribers[subscriber]
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\n🛑 Relay stopped."))
@@ -1,7 +1,4 @@
 import uuid
-import qrcode
-from io import BytesIO
-from django.core.files import File
 from django.db import models
 from django.conf import settings
 from theaters.models import Show, Screen
@@ -45,6 +42,11 @@ PAYMENT_METHOD_CHOICES = [
     ('cash', 'Cash'),
 ]
 
+QR_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('ready', 'Ready'),
+]
+
 # ---------------------- HELPERS ----------------------
 
 def generate_ticket_code():
@@ -88,6 +90,11 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_cancelled = models.BooleanField(default=False)
 
+    class Meta:
+        # "My bookings": a user's active bookings, newest first
+        indexes = [models.Index(fields=['user', '-created_at'], condition=models.Q(is_cancelled=False),
+                                name='bookings_booking_user_active')]
+
     def __str__(self):
         return f"Booking #{self.id} by {self.user.username}"
 
@@ -104,6 +111,18 @@ class BookedSeat(models.Model):
         return f"Booked {self.seat} for {self.booking}"
 
 
+class SeatHold(models.Model):
+    """
+    Temporary claim on a pending booking's seats. Holds are swept by
+    ``expires_at`` so expiring unpaid bookings never scans the Booking table.
+    """
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='hold')
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Hold on Booking #{self.booking_id} until {self.expires_at}"
+
+
 class Payment(models.Model):
     booking = models.OneToOneField(Booking, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=8, decimal_places=2)
@@ -122,24 +141,19 @@ class Ticket(models.Model):
     show = models.ForeignKey(Show, on_delete=models.CASCADE)
     ticket_code = models.CharField(max_length=12, unique=True, default=generate_ticket_code)
     issued_at = models.DateTimeField(default=now)
+    # Legacy pre-rendered images; QR codes are now rendered on demand
     qr_code = models.ImageField(upload_to='tickets/qr_codes/', blank=True, null=True)
+    qr_status = models.CharField(max_length=10, choices=QR_STATUS_CHOICES, default='ready')
 
     class Meta:
         unique_together = ('booking', 'seat')
 
-    def generate_qr_code(self):
-        data = f"Ticket: {self.ticket_code}, Show: {self.show.id}, Seat: {self.seat.seat_number}, Booking ID: {self.booking.id}"
-        qr = qrcode.make(data)
-        buffer = BytesIO()
-        qr.save(buffer, format='PNG')
-        filename = f"{self.ticket_code}_qr.png"
-        self.qr_code.save(filename, File(buffer), save=False)
+    def qr_payload(self):
+        return f"Ticket: {self.ticket_code}, Show: {self.show_id}, Seat: {self.seat.seat_number}, Booking ID: {self.booking_id}"
 
     def save(self, *args, **kwargs):
         if not self.show_id:
             self.show = self.booking.show
-        if not self.qr_code:
-            self.generate_qr_code()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -151,5 +165,26 @@ class Ticket(models.Model):
 def create_tickets_after_payment(sender, instance, created, **kwargs):
     booking = instance.booking
     if instance.status == 'success' and not booking.tickets.exists():
-        for seat in booking.seats.all():
-            Ticket.objects.create(booking=booking, seat=seat, show=booking.show)
+        from .tickets import issue_tickets
+        issue_tickets(booking)
+
+
+@receiver(post_save, sender=ShowSeatPricing)
+def refresh_availability_pricing(sender, instance, **kwargs):
+    from .availability import invalidate
+    invalidate(instance.show_id)
+
+
+@receiver(post_save, sender=Seat)
+def refresh_availability_seats(sender, instance, created, **kwargs):
+    if created:
+        from .availability import invalidate_screen
+        invalidate_screen(instance.screen_id)
+
+
+@receiver(post_save, sender=Show)
+def refresh_availability_show(sender, instance, created, **kwargs):
+    # Cached seat maps carry show details (time, movie) and soft-delete state
+    if not created:
+        from .availability import invalidate
+        invalidate(instance.id)
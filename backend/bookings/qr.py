@@ -0,0 +1,187 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import qrcode
+
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def render_qr_png(data):
+    """
+    Render ``data`` as a PNG QR code and return the image bytes.
+
+    Kept free of Django imports so it can run in spawned worker processes.
+    """
+    buffer = BytesIO()
+    qrcode.make(data).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_qr_svg(data):
+    """
+    Render ``data`` as a compact SVG QR code.
+
+    Dark modules are merged into horizontal runs and drawn as one path in
+    module units, which keeps the markup a fraction of qrcode's own SVG output.
+    """
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(data)
+    matrix = qr.get_matrix()
+    size = len(matrix)
+
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            path.append(f"M{start} {y}h{x - start}v1H{start}z")
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'shape-rendering="crispEdges"><path fill="#fff" d="M0 0h{size}v{size}H0z"/>'
+        f'<path d="{"".join(path)}"/></svg>'
+    ).encode()
+
+
+def render_qr(data, image_format):
+    if image_format == 'svg':
+        return render_qr_svg(data)
+    return render_qr_png(data)
+
+
+def qr_cache_key(data, image_format):
+    return hashlib.sha256(f"{image_format}:{data}".encode()).hexdigest()
+
+
+class QRCodeCache:
+    """
+    Content-addressed, size-bounded LRU cache for rendered QR images.
+
+    Images are keyed by the hash of their format and payload, so a key always
+    maps to the same bytes and doubles as a strong ETag. A small in-memory tier
+    sits in front of an optional on-disk tier; both evict least recently used
+    entries once their byte budget is exceeded.
+    """
+
+    def __init__(self, memory_bytes, directory=None, disk_bytes=0):
+        self.memory_bytes = memory_bytes
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+
+    def get_or_render(self, data, image_format):
+        key = qr_cache_key(data, image_format)
+        content = self.get(key, image_format)
+        if content is None:
+            content = render_qr(data, image_format)
+            self.put(key, image_format, content)
+        return key, content
+
+    def get(self, key, image_format):
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+        content = self._read_disk(key, image_format)
+        if content is not None:
+            self._remember(key, content)
+        return content
+
+    def put(self, key, image_format, content):
+        self._remember(key, content)
+        self._write_disk(key, image_format, content)
+
+    # ---------------------- MEMORY TIER ----------------------
+
+    def _remember(self, key, content):
+        if len(content) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = content
+            self._memory_size += len(content)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    # ---------------------- DISK TIER ----------------------
+
+    def _path(self, key, image_format):
+        return os.path.join(self.directory, key[:2], f"{key}.{image_format}")
+
+    def _read_disk(self, key, image_format):
+        if not self.directory:
+            return None
+        path = self._path(key, image_format)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)  # mtime tracks recency for eviction
+            return content
+        except OSError:
+            return None
+
+    def _write_disk(self, key, image_format, content):
+        if not self.directory or not self.disk_bytes:
+            return
+        path = self._path(key, image_format)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_size += len(content)
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def _scan_disk(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        # Trim to 90% of the budget so eviction does not run on every write
+        entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.disk_bytes * 0.9
+        for path, file_size, _ in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= file_size
+            except OSError:
+                pass
+        self._disk_size = size
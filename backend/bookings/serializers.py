@@ -1,10 +1,23 @@
-from rest_framework import serializers
-from .models import Seat, Booking, Payment, Ticket, ShowSeatPricing
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from .models import SEAT_TYPE_CHOICES, Seat, Booking, BookedSeat, Payment, Ticket, ShowSeatPricing, SeatHold
+from .engine import AllocatorBusy, SeatConflict, SeatNotOffered, SeatScreenMismatch, create_booking
 from theaters.models import Show
+from django.urls import reverse
 from django.utils.timezone import now
 from datetime import timedelta
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
 import uuid
+from . import availability
+
+# 🔹 The show's allocator is backed up: nothing was written, the client should retry
+class ShowBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Bookings for this show are busy right now. Please try again."
+    default_code = 'show_busy'
+    wait = 2  # sent as Retry-After
+
 
 # 🔹 Show Seat Pricing Serializer
 class ShowSeatPricingSerializer(serializers.ModelSerializer):
@@ -26,29 +39,91 @@ class SeatSerializer(serializers.ModelSerializer):
         return pricing_dict.get(obj.seat_type, 0)
 
 
+# 🔹 Shared per-show pricing, loaded once per response
+def load_show_pricing(context, show_ids):
+    """
+    Return ``{show_id: {seat_type: price}}`` cached in the serializer context,
+    fetching any shows not seen yet with a single query.
+    """
+    show_pricing = context.setdefault('show_pricing', {})
+    missing = set(show_ids) - show_pricing.keys()
+    if missing:
+        for show_id in missing:
+            show_pricing[show_id] = {}
+        for show_id, seat_type, price in ShowSeatPricing.objects.filter(
+            show_id__in=missing
+        ).values_list('show_id', 'seat_type', 'price'):
+            show_pricing[show_id][seat_type] = price
+    return show_pricing
+
+
+class ShowPricingListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        load_show_pricing(self.context, {item.show_id for item in items})
+        return super().to_representation(items)
+
+
 # 🔹 Ticket Serializer
 class TicketSerializer(serializers.ModelSerializer):
     seat = serializers.SerializerMethodField()
+    qr_code = serializers.SerializerMethodField()
 
     class Meta:
         model = Ticket
-        fields = ['ticket_code', 'issued_at', 'qr_code', 'seat']
+        fields = ['ticket_code', 'issued_at', 'qr_code', 'qr_status', 'seat']
+        list_serializer_class = ShowPricingListSerializer
 
     def get_seat(self, obj):
         # Use pricing context to pass into seat serializer
-        pricing_qs = ShowSeatPricing.objects.filter(show=obj.show)
-        pricing_dict = {p.seat_type: p.price for p in pricing_qs}
+        pricing_dict = load_show_pricing(self.context, [obj.show_id])[obj.show_id]
         return SeatSerializer(obj.seat, context={'pricing_dict': pricing_dict}).data
 
+    def get_qr_code(self, obj):
+        # QR images are rendered on demand by TicketQRCodeView
+        url = reverse('ticket-qr', kwargs={'pk': obj.pk, 'image_format': 'png'})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+# 🔹 Many-valued primary key field resolved with a single query
+class BulkPrimaryKeyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for pk in data:
+            try:
+                pks.append(queryset.model._meta.pk.to_python(pk))
+            except (TypeError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+        pks = list(dict.fromkeys(pks))
+
+        objects = queryset.in_bulk(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            raise serializers.ValidationError([
+                child.error_messages['does_not_exist'].format(pk_value=pk) for pk in missing
+            ])
+        return [objects[pk] for pk in pks]
+
 
 # 🔹 Booking Serializer
 class BookingSerializer(serializers.ModelSerializer):
-    seats = serializers.PrimaryKeyRelatedField(queryset=Seat.objects.all(), many=True)
+    seats = BulkPrimaryKeyRelatedField(
+        child_relation=serializers.PrimaryKeyRelatedField(queryset=Seat.objects.all())
+    )
     tickets = TicketSerializer(many=True, read_only=True)
 
     class Meta:
         model = Booking
         fields = ['id', 'show', 'seats', 'total_price', 'created_at', 'status', 'tickets']
+        list_serializer_class = ShowPricingListSerializer
         read_only_fields = ['total_price', 'created_at', 'status', 'tickets']
 
     def validate(self, data):
@@ -69,41 +144,29 @@ class BookingSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context['request'].user
-        show = validated_data['show']
-        seats = validated_data['seats']
-
-        with transaction.atomic():
-            # Lock seats
-            locked_seats = Seat.objects.select_for_update().filter(id__in=[s.id for s in seats])
-
-            errors = []
-            for seat in locked_seats:
-                if seat.screen != show.screen:
-                    errors.append(f"Seat {seat.seat_number} does not belong to this screen.")
-                # Booking overlap will be checked at booked seat level
-                from .models import BookedSeat
-                if BookedSeat.objects.filter(show=show, seat=seat).exists():
-                    errors.append(f"Seat {seat.seat_number} is already booked for this show.")
-
-            if errors:
-                raise serializers.ValidationError({"seats": errors})
-
-            # Price calculation
-            pricing_qs = ShowSeatPricing.objects.filter(show=show)
-            pricing_dict = {p.seat_type: p.price for p in pricing_qs}
-            total_price = sum([pricing_dict.get(seat.seat_type, 0) for seat in locked_seats])
-
-            # Create booking
-            booking = Booking.objects.create(user=user, show=show, total_price=total_price)
-            booking.seats.set(locked_seats)
-
-            # Mark seats as booked for this show
-            from .models import BookedSeat
-            BookedSeat.objects.bulk_create([
-                BookedSeat(show=show, seat=seat, booking=booking) for seat in locked_seats
-            ])
-
-            return booking
+        try:
+            return create_booking(user, validated_data['show'], validated_data['seats'])
+        except SeatNotOffered as e:
+            raise serializers.ValidationError({
+                "seats": [f"Seat {number} is no longer offered on this screen." for number in e.seat_numbers]
+            })
+        except SeatScreenMismatch as e:
+            raise serializers.ValidationError({
+                "seats": [f"Seat {number} does not belong to this screen." for number in e.seat_numbers]
+            })
+        except SeatConflict as e:
+            raise serializers.ValidationError({
+                "seats": [f"Seat {number} is already booked for this show." for number in e.seat_numbers]
+                or ["Some of these seats were just booked. Please try again."]
+            })
+        except AllocatorBusy:
+            raise ShowBusy()
+
+
+# 🔹 Best available seats request
+class BestSeatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, max_value=10)
+    seat_type = serializers.ChoiceField(choices=SEAT_TYPE_CHOICES, required=False)
 
 
 # 🔹 Payment Serializer
@@ -130,6 +193,9 @@ class PaymentSerializer(serializers.ModelSerializer):
         if Payment.objects.filter(booking=booking).exists():
             raise serializers.ValidationError("Payment already exists for this booking.")
 
+        if booking.status != 'pending':
+            raise serializers.ValidationError("This booking can no longer be paid for.")
+
         transaction_id = str(uuid.uuid4()).replace('-', '')[:12].upper()
 
         validated_data.pop('booking')
@@ -158,14 +224,25 @@ class PaymentSerializer(serializers.ModelSerializer):
 
         # ✅ Set status and paid time
         if status == 'success':
-            instance.status = 'success'
-            instance.paid_at = now()
-            instance.save()
-
-            # 🔥 Update the related booking status to "confirmed"
-            booking = instance.booking
-            booking.status = 'confirmed'
-            booking.save()
+            with transaction.atomic():
+                # ✅ Seats are only held for a limited time before payment
+                booking = Booking.objects.select_for_update().get(pk=instance.booking_id)
+                hold = SeatHold.objects.filter(booking=booking).first()
+                if booking.status != 'pending' or (hold and hold.expires_at <= now()):
+                    raise serializers.ValidationError("Seat hold has expired. Please book again.")
+
+                instance.booking = booking
+                instance.status = 'success'
+                instance.paid_at = now()
+                instance.save()
+
+                # 🔥 Update the related booking status to "confirmed"
+                booking.status = 'confirmed'
+                booking.save()
+                SeatHold.objects.filter(booking=booking).delete()
+
+                seat_ids = list(BookedSeat.objects.filter(booking=booking).values_list('seat_id', flat=True))
+                transaction.on_commit(lambda: availability.mark_booked(booking.show_id, seat_ids))
 
         elif status == 'failed':
             instance.status = 'failed'
@@ -1,3 +1,336 @@
-from django.test import TestCase
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from movies.models import Movie
+from theaters.models import Screen, Show, Theater
+from users.models import User
+from . import allocator, availability
+from .allocator import Book, ShowAllocator
+from .engine import (
+    AllocatorBusy, SeatConflict, SeatScreenMismatch, _prices, cancel_booking, create_booking,
+)
+from .holds import release_expired_holds
+from .models import BookedSeat, Booking, Seat, SeatHold, ShowSeatPricing
+
+
+class BookingFixtures:
+    """A screen with the default 30-seat layout (A1-10, B1-15, C1-5) and one show on it."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='x', role='user', phone='100')
+        self.other = User.objects.create_user('rival', password='x', role='user', phone='101')
+        self.owner = User.objects.create_user('owner', password='x', role='theater_owner', phone='102')
+        self.movie = Movie.objects.create(
+            title='Film', description='d', language='Hindi', genre='Drama', duration=120, rating=8,
+            release_date='2020-01-01', created_by=self.owner,
+        )
+        self.theater = Theater.objects.create(name='Cinema', location='Mumbai, Mall', created_by=self.owner)
+        self.screen = Screen.objects.create(name='Screen 1', theater=self.theater, created_by=self.owner)
+        self.show = Show.objects.create(screen=self.screen, movie=self.movie,
+                                        show_time=now() + timedelta(days=1), created_by=self.owner)
+        availability.invalidate_all()
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        availability.invalidate_all()
+
+    def seat(self, seat_number, screen=None):
+        return Seat.objects.get(screen=screen or self.screen, seat_number=seat_number)
+
+    def available_numbers(self):
+        response = self.client.get(f'/api/bookings/seats/{self.show.id}/')
+        self.assertEqual(response.status_code, 200)
+        return {seat['seat_number'] for seat in response.json()}
+
+    def book(self, *seat_numbers):
+        seat_ids = [self.seat(seat_number).id for seat_number in seat_numbers]
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/bookings/create/', {'show': self.show.id, 'seats': seat_ids},
+                                    format='json')
+
+
+class AvailabilityTests(BookingFixtures, TestCase):
+
+    def test_booking_and_cancelling_update_available_seats(self):
+        self.assertEqual(len(self.available_numbers()), 30)
+
+        response = self.book('A1', 'A2')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.available_numbers()), 28)
+        self.assertNotIn('A1', self.available_numbers())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/bookings/{response.json()['id']}/cancel/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.available_numbers()), 30)
+
+    def test_seat_map_marks_held_seats(self):
+        self.book('B3')
+        seat_map = self.client.get(f'/api/bookings/seats/{self.show.id}/map/').json()
+        rows = {row['label']: row for row in seat_map['rows']}
+        self.assertEqual(rows['B']['state'][2], availability.STATE_CODES[availability.HELD])
+        self.assertEqual(rows['B']['state'][3], availability.STATE_CODES[availability.FREE])
+
+    def test_pricing_change_invalidates_cached_prices(self):
+        self.available_numbers()
+        ShowSeatPricing.objects.filter(show=self.show, seat_type='vip').update(price=999)
+        # update() sends no signal: the cached copy is still served
+        self.assertEqual(availability.get_availability(self.show.id).price('vip'), '350.00')
+
+        pricing = ShowSeatPricing.objects.get(show=self.show, seat_type='vip')
+        pricing.save()
+        self.assertEqual(availability.get_availability(self.show.id).price('vip'), '999.00')
+
+    def test_bookings_of_other_processes_show_up_after_invalidate(self):
+        self.available_numbers()
+        booking = Booking.objects.create(user=self.other, show=self.show, total_price=350)
+        BookedSeat.objects.create(show=self.show, seat=self.seat('A5'), booking=booking)
+        self.assertIn('A5', self.available_numbers())
+
+        availability.invalidate(self.show.id)
+        self.assertNotIn('A5', self.available_numbers())
+
+    def test_duplicate_seat_is_booked_under_its_canonical_id(self):
+        canonical = self.seat('C1')
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='C1', seat_type='premium')
+
+        seating = availability.get_seating(self.screen.id)
+        self.assertEqual(seating.canonical_id(duplicate.id), canonical.id)
+        self.assertEqual(len(seating.seats), 30)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/bookings/create/', {'show': self.show.id, 'seats': [duplicate.id]},
+                                        format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(BookedSeat.objects.values_list('seat_id', flat=True)), [canonical.id])
+
+        response = self.client.post('/api/bookings/create/', {'show': self.show.id, 'seats': [canonical.id]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_booking_through_a_booked_duplicate_conflicts(self):
+        canonical = self.seat('C2')
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='C2', seat_type='premium')
+        # Booked through the duplicate before it was folded into its seat
+        booking = Booking.objects.create(user=self.other, show=self.show, total_price=500)
+        BookedSeat.objects.create(show=self.show, seat=duplicate, booking=booking)
+        availability.invalidate(self.show.id)
+
+        self.assertNotIn('C2', self.available_numbers())
+        with self.assertRaises(SeatConflict):
+            create_booking(self.user, self.show, [canonical])
+
+
+class HoldExpiryTests(BookingFixtures, TestCase):
+
+    def test_expired_holds_release_their_seats(self):
+        booking_id = self.book('A1', 'A2').json()['id']
+        self.assertEqual(len(self.available_numbers()), 28)
+        SeatHold.objects.filter(booking_id=booking_id).update(expires_at=now() - timedelta(seconds=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(release_expired_holds(), 1)
+
+        self.assertEqual(Booking.objects.get(pk=booking_id).status, 'expired')
+        self.assertFalse(BookedSeat.objects.filter(booking_id=booking_id).exists())
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(len(self.available_numbers()), 30)
+
+    def test_live_and_paid_holds_are_kept(self):
+        live_id = self.book('A1').json()['id']
+        paid_id = self.book('A2').json()['id']
+        Booking.objects.filter(pk=paid_id).update(status='confirmed')
+        SeatHold.objects.filter(booking_id=paid_id).update(expires_at=now() - timedelta(seconds=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(release_expired_holds(), 0)
+
+        self.assertEqual(Booking.objects.get(pk=live_id).status, 'pending')
+        self.assertEqual(Booking.objects.get(pk=paid_id).status, 'confirmed')
+        self.assertEqual(BookedSeat.objects.count(), 2)
+        # The paid booking's hold is gone, the live one still counts down
+        self.assertEqual(list(SeatHold.objects.values_list('booking_id', flat=True)), [live_id])
+
+    def test_expiry_works_in_batches(self):
+        booking_ids = [self.book(f'B{i}').json()['id'] for i in range(1, 6)]
+        SeatHold.objects.update(expires_at=now() - timedelta(seconds=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(release_expired_holds(batch_size=2), 5)
+        self.assertEqual(set(Booking.objects.filter(status='expired').values_list('id', flat=True)), set(booking_ids))
+
+
+class EngineTests(BookingFixtures, TestCase):
+
+    def assert_conflicts(self, engine):
+        seats = [self.seat('A1'), self.seat('A2')]
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = create_booking(self.user, self.show, seats, engine=engine)
+        self.assertEqual(booking.status, 'pending')
+        self.assertEqual(booking.total_price, 700)
+        self.assertTrue(SeatHold.objects.filter(booking=booking).exists())
+
+        with self.assertRaises(SeatConflict) as caught:
+            create_booking(self.other, self.show, [self.seat('A2'), self.seat('A3')], engine=engine)
+        self.assertEqual(caught.exception.seat_numbers, ['A2'])
+        # The losing booking left nothing behind
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(BookedSeat.objects.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertCountEqual(cancel_booking(booking, engine=engine), [seat.id for seat in seats])
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled_user')
+        self.assertTrue(booking.is_cancelled)
+        create_booking(self.other, self.show, [self.seat('A2')], engine=engine)
+
+    def test_locking_engine_conflicts(self):
+        self.assert_conflicts('locking')
+
+    def test_optimistic_engine_conflicts(self):
+        self.assert_conflicts('optimistic')
+
+    def test_allocator_engine_locks_inside_a_transaction(self):
+        self.assert_conflicts('allocator')
+        self.assertFalse(allocator._allocators)
+
+    def test_seats_of_another_screen_are_rejected(self):
+        other_screen = Screen.objects.create(name='Screen 2', theater=self.theater, created_by=self.owner)
+        Show.objects.create(screen=other_screen, movie=self.movie, show_time=now() + timedelta(days=2),
+                            created_by=self.owner)
+
+        for engine in ('locking', 'optimistic'):
+            with self.assertRaises(SeatScreenMismatch):
+                create_booking(self.user, self.show, [self.seat('A1', other_screen)], engine=engine)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_api_reports_conflicting_seats(self):
+        self.assertEqual(self.book('A1').status_code, 201)
+        response = self.book('A1', 'A2')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('A1', str(response.json()))
+
+
+class AllocatorBatchTests(BookingFixtures, TestCase):
+    """Drives an allocator's batch loop in the test thread."""
+
+    def queue(self, allocator_, user, *seat_numbers):
+        command = Book(user, self.show, [self.seat(seat_number) for seat_number in seat_numbers],
+                       _prices(self.show), Future())
+        allocator_.commands.put(command)
+        return command
+
+    def test_batch_is_decided_in_memory_and_written_together(self):
+        allocator_ = ShowAllocator(self.show.id)
+        commands = [self.queue(allocator_, self.user, f'B{i}') for i in range(1, 11)]
+        losing = self.queue(allocator_, self.other, 'B1', 'B11')
+
+        batch = allocator_._next_batch()
+        self.assertEqual(len(batch), 11)
+        with CaptureQueriesContext(connection) as queries:
+            allocator_._process(batch)
+
+        bookings = [command.future.result() for command in commands]
+        self.assertEqual(len({booking.id for booking in bookings}), 10)
+        with self.assertRaises(SeatConflict) as caught:
+            losing.future.result()
+        self.assertEqual(caught.exception.seat_numbers, ['B1'])
+
+        self.assertEqual(BookedSeat.objects.count(), 10)
+        self.assertEqual(SeatHold.objects.count(), 10)
+        self.assertEqual(Booking.seats.through.objects.count(), 10)
+        # One load of the taken seats and a handful of bulk inserts, not one round per booking
+        self.assertLess(len(queries), 15)
+
+    @override_settings(BOOKING_ALLOCATOR_BATCH_SIZE=4)
+    def test_batches_are_capped(self):
+        allocator_ = ShowAllocator(self.show.id)
+        for i in range(1, 7):
+            self.queue(allocator_, self.user, f'B{i}')
+        self.assertEqual(len(allocator_._next_batch()), 4)
+        self.assertEqual(len(allocator_._next_batch()), 2)
+
+    def test_seats_booked_elsewhere_are_picked_up(self):
+        allocator_ = ShowAllocator(self.show.id)
+        self.queue(allocator_, self.user, 'B1')
+        allocator_._process(allocator_._next_batch())
+
+        # Another process books B2 after the allocator loaded its taken seats
+        create_booking(self.other, self.show, [self.seat('B2')], engine='locking')
+        command = self.queue(allocator_, self.user, 'B2')
+        allocator_._process(allocator_._next_batch())
+        with self.assertRaises(SeatConflict):
+            command.future.result()
+
+    def test_cancelled_seats_can_be_booked_again(self):
+        allocator_ = ShowAllocator(self.show.id)
+        first = self.queue(allocator_, self.user, 'B1')
+        allocator_._process(allocator_._next_batch())
+
+        allocator_._cancel(first.future.result())
+        second = self.queue(allocator_, self.other, 'B1')
+        allocator_._process(allocator_._next_batch())
+        self.assertEqual(second.future.result().user, self.other)
+
+
+@override_settings(BOOKING_ENGINE='allocator', BOOKING_ALLOCATOR_IDLE=1)
+class AllocatorThreadTests(BookingFixtures, TransactionTestCase):
+    """Bookings go through the allocator threads, which need committed data."""
+
+    def tearDown(self):
+        allocator.stop_all(timeout=5)
+        super().tearDown()
+
+    def test_competing_bookings_get_one_winner(self):
+        seat = self.seat('A1')
+        users = [self.user, self.other] + [
+            User.objects.create_user(f'fan{i}', password='x', role='user', phone=f'20{i}') for i in range(6)
+        ]
+
+        def attempt(user):
+            try:
+                return create_booking(user, self.show, [seat])
+            except SeatConflict:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            results = list(pool.map(attempt, users))
+
+        self.assertEqual(len([booking for booking in results if booking]), 1)
+        self.assertEqual(BookedSeat.objects.filter(show=self.show).count(), 1)
+        self.assertIn(self.show.id, allocator._allocators)
+
+        winner = next(booking for booking in results if booking)
+        cancel_booking(winner)
+        self.assertFalse(BookedSeat.objects.exists())
+
+    @override_settings(BOOKING_ALLOCATOR_MAX=0)
+    def test_falls_back_to_locking_when_allocators_are_capped(self):
+        booking = create_booking(self.user, self.show, [self.seat('A1')])
+        self.assertFalse(allocator._allocators)
+        self.assertTrue(BookedSeat.objects.filter(booking=booking).exists())
+
+        with self.assertRaises(SeatConflict):
+            create_booking(self.other, self.show, [self.seat('A1')])
+        self.assertEqual(cancel_booking(booking), [self.seat('A1').id])
+        self.assertFalse(allocator._allocators)
+
+    def test_busy_allocator_asks_to_retry(self):
+        seat_id = self.seat('A1').id
+        with mock.patch('bookings.allocator.book', side_effect=AllocatorBusy(self.show.id)):
+            response = self.client.post('/api/bookings/create/', {'show': self.show.id, 'seats': [seat_id]},
+                                        format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertFalse(Booking.objects.exists())
@@ -0,0 +1,131 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Booking, Ticket
+from .qr import QRCodeCache, qr_cache_key, render_qr_png
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_dispatcher = None
+_renderers = None
+_qr_cache = None
+
+
+def get_qr_cache():
+    global _qr_cache
+    with _lock:
+        if _qr_cache is None:
+            config = settings.TICKET_QR_CACHE
+            _qr_cache = QRCodeCache(
+                memory_bytes=config['MEMORY_BYTES'],
+                directory=config.get('DIR'),
+                disk_bytes=config.get('DISK_BYTES', 0),
+            )
+        return _qr_cache
+
+
+def _get_dispatcher():
+    # A single thread owns the database side of rendering so batches are
+    # written one at a time, while the image work fans out to processes.
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ticket-qr')
+        return _dispatcher
+
+
+def _get_renderers():
+    global _renderers
+    workers = getattr(settings, 'TICKET_QR_WORKERS', 2)
+    if not workers:
+        return None
+    with _lock:
+        if _renderers is None:
+            _renderers = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _renderers
+
+
+def issue_tickets(booking):
+    """
+    Issue the booking's tickets in the background once the payment commits,
+    so the payment request neither writes tickets nor renders QR codes.
+    """
+    booking_id = booking.id
+    transaction.on_commit(lambda: schedule_ticket_issuing(booking_id))
+
+
+def schedule_ticket_issuing(booking_id):
+    return _get_dispatcher().submit(issue_and_render, booking_id)
+
+
+def issue_and_render(booking_id):
+    """
+    Create the booking's tickets as pending, render their QR codes into the
+    QR cache, then mark them ready. Returns the number of tickets rendered.
+    """
+    try:
+        create_tickets(booking_id)
+    except Exception:
+        logger.exception("Ticket issuing failed for booking #%s", booking_id)
+        connection.close()
+        raise
+    return render_ticket_qr_codes(booking_id)
+
+
+def create_tickets(booking_id):
+    """One pending ticket per booked seat, unless the booking already has its tickets."""
+    booking = Booking.objects.filter(pk=booking_id, is_cancelled=False).only('id', 'show_id').first()
+    if booking is None or Ticket.objects.filter(booking_id=booking_id).exists():
+        return 0
+    tickets = Ticket.objects.bulk_create([
+        Ticket(booking_id=booking_id, seat_id=seat_id, show_id=booking.show_id, qr_status='pending')
+        for seat_id in booking.seats.values_list('id', flat=True)
+    ], ignore_conflicts=True)  # another process may be issuing them too
+    return len(tickets)
+
+
+def render_ticket_qr_codes(booking_id):
+    """
+    Render PNG QR codes for all pending tickets of a booking into the QR cache
+    (in ``TICKET_QR_WORKERS`` processes) and mark them ready.
+    """
+    try:
+        tickets = list(
+            Ticket.objects.filter(booking_id=booking_id, qr_status='pending').select_related('seat')
+        )
+        if not tickets:
+            return 0
+
+        cache = get_qr_cache()
+        payloads = [ticket.qr_payload() for ticket in tickets]
+        keys = [qr_cache_key(payload, 'png') for payload in payloads]
+        missing = [
+            (key, payload) for key, payload in zip(keys, payloads)
+            if cache.get(key, 'png') is None
+        ]
+
+        renderers = _get_renderers()
+        missing_payloads = [payload for _, payload in missing]
+        images = (
+            renderers.map(render_qr_png, missing_payloads) if renderers
+            else map(render_qr_png, missing_payloads)
+        )
+        for (key, _), image in zip(missing, images):
+            cache.put(key, 'png', image)
+
+        Ticket.objects.filter(id__in=[ticket.id for ticket in tickets]).update(qr_status='ready')
+        return len(tickets)
+    except Exception:
+        logger.exception("QR rendering failed for booking #%s", booking_id)
+        raise
+    finally:
+        connection.close()
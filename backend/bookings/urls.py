@@ -1,16 +1,19 @@
 from django.urls import path
 from .views import (
     CreateBulkSeatView,
-    SeatListView,
+    SeatListView, SeatMapView, SeatEventsView, BestSeatsView,
     BookingCreateView, BookingCancelView, BookingListView, BookingDetailView,
     PaymentCreateView, PaymentDetailView, PaymentUpdateView,
-    TicketListView, TicketDetailView,
+    TicketListView, TicketDetailView, TicketQRCodeView,
     ShowSeatPricingListView, ShowSeatPricingCreateView, ShowSeatPricingUpdateView
 )
 
 urlpatterns = [
     # Seats
     path('seats/<int:show_id>/', SeatListView.as_view(), name='available-seats'),
+    path('seats/<int:show_id>/map/', SeatMapView.as_view(), name='seat-map'),
+    path('seats/<int:show_id>/events/', SeatEventsView.as_view(), name='seat-events'),
+    path('seats/<int:show_id>/best/', BestSeatsView.as_view(), name='best-seats'),
     path('seats/bulk-create/<slug:screen_slug>/', CreateBulkSeatView.as_view(), name='bulk-seat-create'),
 
     # Bookings
@@ -27,6 +30,7 @@ urlpatterns = [
     # Tickets
     path('tickets/', TicketListView.as_view(), name='ticket-list'),
     path('tickets/<int:pk>/', TicketDetailView.as_view(), name='ticket-detail'),
+    path('tickets/<int:pk>/qr.<str:image_format>', TicketQRCodeView.as_view(), name='ticket-qr'),
 
     # Seat Pricing
     path('pricing/<int:show_id>/', ShowSeatPricingListView.as_view(), name='show-seat-pricing'),
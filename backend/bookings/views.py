@@ -1,19 +1,37 @@
+import asyncio
+import json
+from decimal import Decimal
+
 from rest_framework import generics, permissions
 from rest_framework.views import APIView
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.utils.http import parse_etags
 from django.utils.timezone import now
-from django.db.models import Q
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q, Prefetch
 from django.shortcuts import get_object_or_404
-from theaters.models import Theater, Screen, Show
-
-from .models import Seat, Booking, Payment, Ticket, ShowSeatPricing, BookedSeat
+from theaters.layout import layout_from_seats
+from theaters.models import Theater, Screen, ScreenLayout, Show
+
+from . import availability, events
+from .engine import AllocatorBusy, SeatConflict, SeatScreenMismatch, cancel_booking, create_booking
+from .qr import QR_FORMATS, qr_cache_key
+from .tickets import get_qr_cache
+from .models import Seat, Booking, Payment, Ticket, ShowSeatPricing
 from .serializers import (
-    SeatSerializer,
     BookingSerializer,
+    BestSeatsSerializer,
     PaymentSerializer,
     TicketSerializer,
-    ShowSeatPricingSerializer
+    ShowSeatPricingSerializer,
+    ShowBusy,
 )
 from .permissions import (
     IsRegularUser,
@@ -25,20 +43,140 @@ from .permissions import (
 )
 from theaters.models import Show
 
-# 🔹 List available seats for a show
-class SeatListView(generics.ListAPIView):
-    serializer_class = SeatSerializer
-
-    def get_queryset(self):
-        show = Show.objects.get(pk=self.kwargs['show_id'])
-        booked_seat_ids = BookedSeat.objects.filter(show=show).values_list('seat_id', flat=True)
-        return Seat.objects.filter(screen=show.screen).exclude(id__in=booked_seat_ids)
-
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        pricing_qs = ShowSeatPricing.objects.filter(show_id=self.kwargs['show_id'])
-        context['pricing_dict'] = {p.seat_type: p.price for p in pricing_qs}
-        return context
+# 🔹 List available seats for a show (served from the in-memory availability map)
+class SeatListView(APIView):
+    def get(self, request, show_id):
+        return Response(availability.get_availability(show_id).available_seats())
+
+
+# 🔹 Full seat map of a show: grid, seat states, prices and show details in one
+# response. Rows are encoded as strings (see availability.STATE_LEGEND) and the
+# ETag lets polling clients get a 304 without any work on the server.
+class SeatMapView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # The JSON is pre-encoded, so never reject on the Accept header
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, show_id):
+        show_availability = availability.get_availability(show_id)
+        if not show_availability.seating.has_grid:
+            raise NotFound("This screen has no seat layout.")
+
+        etag, content = show_availability.seat_map()
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+# 🔹 Best available block of seats for a show. GET suggests it; POST books it
+# with a seat hold, picking again if another booking claims the block first.
+class BestSeatsView(APIView):
+    attempts = 3
+
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [permissions.IsAuthenticated(), IsRegularUser()]
+        return super().get_permissions()
+
+    def best_seats(self, show_id, params):
+        show_availability = availability.get_availability(show_id)
+        if not show_availability.seating.has_grid:
+            raise NotFound("This screen has no seat layout.")
+        seats = show_availability.best_seats(params['count'], params.get('seat_type'))
+        if seats is None:
+            raise NotFound(f"No {params['count']} seats together are available.")
+        return seats
+
+    def get(self, request, show_id):
+        params = BestSeatsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        seats = self.best_seats(show_id, params.validated_data)
+        total = sum((Decimal(seat['price']) for seat in seats), availability.NO_PRICE)
+        return Response({'seats': seats, 'total_price': str(total)})
+
+    def post(self, request, show_id):
+        params = BestSeatsSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        context = {'request': request}
+
+        for _ in range(self.attempts):
+            seats = self.best_seats(show_id, params.validated_data)
+            serializer = BookingSerializer(data={'show': show_id, 'seats': [seat['id'] for seat in seats]},
+                                           context=context)
+            serializer.is_valid(raise_exception=True)
+            try:
+                booking = create_booking(request.user, serializer.validated_data['show'],
+                                         serializer.validated_data['seats'])
+            except SeatConflict:
+                # Our copy of the show's seats is behind; rebuild it and pick again
+                availability.invalidate(show_id)
+                continue
+            except SeatScreenMismatch:
+                # The screen's layout changed under us (seats dropped or moved)
+                availability.invalidate_screen(serializer.validated_data['show'].screen_id)
+                continue
+            except AllocatorBusy:
+                raise ShowBusy()
+            return Response(BookingSerializer(booking, context=context).data, status=201)
+
+        raise ValidationError({"seats": ["These seats are selling fast. Please try again."]})
+
+
+# 🔹 Live seat changes for a show as server-sent events (ASGI only). The stream
+# opens with the full seat map, then sends held/booked/released deltas.
+class SeatEventsView(View):
+    async def get(self, request, show_id):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"detail": "Seat events are only served by the ASGI application (bookmyshow.asgi)."}, status=501
+            )
+        try:
+            await sync_to_async(availability.get_availability)(show_id)
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+        response = StreamingHttpResponse(seat_event_stream(show_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+async def seat_event_stream(show_id):
+    keepalive = getattr(settings, 'SEAT_EVENTS', {}).get('KEEPALIVE', 15)
+    # Subscribe before taking the snapshot so no change falls in between
+    subscription = events.get_broker().subscribe(events.show_channel(show_id))
+    try:
+        show_availability = await sync_to_async(availability.get_availability)(show_id)
+        if show_availability.seating.has_grid:
+            _, content = show_availability.seat_map()
+            yield b"event: snapshot\ndata: " + content + b"\n\n"
+
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                # Fell too far behind: the client should reload the seat map
+                yield b"event: resync\ndata: {}\n\n"
+                return
+            yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n".encode()
+    finally:
+        subscription.close()
+
+
+# Related rows serialized with every booking (seat ids and tickets with their seats)
+BOOKING_PREFETCH = (
+    'seats',
+    Prefetch('tickets', queryset=Ticket.objects.select_related('seat')),
+)
 
 
 # 🔹 Create a booking
@@ -59,12 +197,12 @@ class BookingListView(generics.ListAPIView):
         return Booking.objects.filter(
             user=self.request.user,
             is_cancelled=False
-        ).order_by('-created_at')
+        ).prefetch_related(*BOOKING_PREFETCH).order_by('-created_at')
 
 
 # 🔹 Retrieve/Update/Delete a booking
 class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Booking.objects.all()
+    queryset = Booking.objects.prefetch_related(*BOOKING_PREFETCH)
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated, IsBookingOwnerOrReadOnly]
 
@@ -85,14 +223,10 @@ class BookingCancelView(APIView):
         if now() > booking.show.show_time:
             raise ValidationError("Cannot cancel booking after the show has started.")
 
-        booking.is_cancelled = True
-        booking.status = "cancelled"
-        booking.save()
-
-        # Release seats
-        BookedSeat.objects.filter(booking=booking).delete()
-        
-        Ticket.objects.filter(booking=booking).delete()
+        try:
+            cancel_booking(booking)
+        except AllocatorBusy:
+            raise ShowBusy()
 
         return Response({"detail": "Booking cancelled and seats released."}, status=200)
 
@@ -127,16 +261,45 @@ class TicketListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsRegularUser]
 
     def get_queryset(self):
-        return Ticket.objects.filter(booking__user=self.request.user)
+        return Ticket.objects.filter(booking__user=self.request.user).select_related('seat')
 
 
 # 🔹 Retrieve individual ticket
 class TicketDetailView(generics.RetrieveAPIView):
-    queryset = Ticket.objects.all()
+    queryset = Ticket.objects.select_related('seat', 'booking')
     serializer_class = TicketSerializer
     permission_classes = [permissions.IsAuthenticated, IsTicketOwner]
 
 
+# 🔹 Render a ticket QR code on demand (PNG or SVG)
+class TicketQRCodeView(generics.RetrieveAPIView):
+    queryset = Ticket.objects.select_related('seat', 'booking')
+    permission_classes = [permissions.IsAuthenticated, IsTicketOwner]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The image bypasses DRF renderers, so never reject on the Accept header
+        return super().perform_content_negotiation(request, force=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        image_format = kwargs['image_format']
+        if image_format not in QR_FORMATS:
+            raise NotFound("Unsupported QR code format.")
+
+        payload = self.get_object().qr_payload()
+        etag = f'"{qr_cache_key(payload, image_format)}"'
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            _, content = get_qr_cache().get_or_render(payload, image_format)
+            response = HttpResponse(content, content_type=QR_FORMATS[image_format])
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
 # 🔹 List seat pricing for a show
 class ShowSeatPricingListView(generics.ListAPIView):
     serializer_class = ShowSeatPricingSerializer
@@ -184,11 +347,34 @@ class CreateBulkSeatView(APIView):
         if not rows or not seats_per_row or not seat_type_map:
             return Response({"detail": "Missing required data."}, status=400)
 
-        seats = []
-        for row_letter, seat_type in seat_type_map.items():
-            for num in range(1, seats_per_row + 1):
-                seat_number = f"{row_letter}{num}"
-                seats.append(Seat(screen=screen, seat_number=seat_number, seat_type=seat_type))
+        if not isinstance(seat_type_map, dict):
+            return Response({"detail": "seat_type_map must map row letters to seat types."}, status=400)
+
+        # Posted rows replace the same rows of the current layout, others are kept
+        layout = ScreenLayout.objects.filter(screen=screen).first()
+        if layout:
+            current = [(position.seat_number, position.seat_type) for position in layout.seat_positions()]
+        else:
+            layout = ScreenLayout(screen=screen)
+            current = Seat.objects.filter(screen=screen).order_by('-id').values_list('seat_number', 'seat_type')
+        seats = {
+            seat_number: seat_type for seat_number, seat_type in current
+            if seat_number.rstrip('0123456789') not in seat_type_map
+        }
 
-        Seat.objects.bulk_create(seats)
+        try:
+            for row_letter, seat_type in seat_type_map.items():
+                for num in range(1, int(seats_per_row) + 1):
+                    seats[f"{row_letter}{num}"] = seat_type
+            layout.rows, layout.columns, layout.seat_types = layout_from_seats(seats.items())
+            layout.aisles = request.data.get("aisles", layout.aisles)
+            layout.full_clean(exclude=['screen'])
+        except DjangoValidationError as e:
+            return Response(e.message_dict, status=400)
+        except (TypeError, ValueError) as e:
+            return Response({"detail": str(e)}, status=400)
+
+        # Saving the layout creates the missing Seat rows
+        with transaction.atomic():
+            layout.save()
         return Response({"detail": "Seats created successfully."}, status=201)
@@ -0,0 +1,27 @@
+"""
+Database helpers shared by the long-running management commands.
+"""
+import os
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_STATEMENT_TIMEOUT = re.compile(r'-c statement_timeout=\S+')
+
+
+def lift_statement_timeout(using=DEFAULT_DB_ALIAS):
+    """
+    Run this process without the per-statement timeout web requests get
+    (``DB_STATEMENT_TIMEOUT_MS``), for commands whose statements take longer.
+    Covers the open connection, later ones, and worker processes spawned
+    from here (they read the environment again).
+    """
+    os.environ['DB_STATEMENT_TIMEOUT_MS'] = '0'
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    options = connection.settings_dict['OPTIONS']
+    options['options'] = _STATEMENT_TIMEOUT.sub('-c statement_timeout=0', options.get('options', ''))
+    if connection.connection is not None:
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = 0')
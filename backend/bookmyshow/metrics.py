@@ -0,0 +1,139 @@
+"""
+In-memory request metrics.
+
+Each URL name gets fixed-size histograms for latency, query count and query
+time, so memory stays constant however long the process runs. Percentiles are
+estimated from the histogram buckets.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+# Upper bounds of the histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750,
+    1000, 1500, 2000, 3000, 5000, 10000,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 75, 100, 200, 500)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count', 'max')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                # A bucket's upper bound can overshoot the largest value seen
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'p50': round(self.percentile(50), 2),
+            'p95': round(self.percentile(95), 2),
+            'p99': round(self.percentile(99), 2),
+            'max': round(self.max, 2),
+            'mean': round(self.total / self.count, 2) if self.count else 0,
+        }
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'errors', 'latency', 'queries', 'db_time')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS_MS)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, name, status_code, duration_ms, query_count, db_time_ms):
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = EndpointStats()
+            stats.requests += 1
+            if status_code >= 500:
+                stats.errors += 1
+            stats.latency.record(duration_ms)
+            stats.queries.record(query_count)
+            stats.db_time.record(db_time_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'latency_ms': stats.latency.summary(),
+                    'queries': stats.queries.summary(),
+                    'db_time_ms': stats.db_time.summary(),
+                }
+                for name, stats in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts queries and their total time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    wrapped = []
+    try:
+        for connection in connections.all():
+            connection.execute_wrappers.append(counter)
+            wrapped.append(connection)
+        yield counter
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(counter)
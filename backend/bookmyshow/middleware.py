@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+
+from .metrics import count_queries, registry
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, query count and DB time per URL name in the metrics
+    registry, optionally echoing them back in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with count_queries() as queries:
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        db_time_ms = queries.duration * 1000
+
+        match = request.resolver_match
+        name = match.view_name if match else '<unresolved>'
+        registry.record(name, response.status_code, duration_ms, queries.count, db_time_ms)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={db_time_ms:.1f};desc="{queries.count} queries", app;dur={duration_ms:.1f}'
+            )
+        return response
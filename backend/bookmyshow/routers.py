@@ -0,0 +1,117 @@
+"""
+Read-replica routing.
+
+Writes and reads always go to ``default`` unless a view opts in with
+``ReplicaReadMixin``: its safe requests read from one of
+``DATABASE_REPLICAS``. The choice lives in a context variable, so it is
+scoped to the request being served (threads and ASGI tasks alike) and
+everything else (bookings, payments, transactions, background threads)
+keeps reading from the primary.
+
+A client that just wrote is pinned to the primary for
+``REPLICA_STICKY_SECONDS`` so it reads its own writes despite replication
+lag: browsers through a cookie, authenticated users also through the cache
+(JWT clients may not send cookies), which must be a shared one for every
+worker process to see it.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_COOKIE = 'db_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even in a replica-reading view."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or not _use_replica.get():
+            return DEFAULT_DB_ALIAS
+        # The database cache holds the catalog version: a lagging copy would be stale
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see what it wrote
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replicas()
+
+
+def _user_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+
+def is_sticky(request):
+    if request.COOKIES.get(STICKY_COOKIE):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and cache.get(_user_key(user.pk)))
+
+
+class ReplicaReadMixin:
+    """Read-only API views whose safe requests may be served from a replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replicas() and not is_sticky(request):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """Pins clients to the primary for a while after a successful write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replicas():
+            seconds = sticky_seconds()
+            response.set_cookie(STICKY_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+            # DRF stores the authenticated (e.g. JWT) user on the request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(_user_key(user.pk), True, seconds)
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 INSTALLED_APPS += ['users', 'movies', 'theaters', 'bookings']
 
 MIDDLEWARE = [
+    'bookmyshow.middleware.RequestMetricsMiddleware',
+    'bookmyshow.routers.ReplicaStickinessMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -81,12 +84,79 @@ WSGI_APPLICATION = 'bookmyshow.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from the environment. DB_ENGINE=postgres is the production profile:
+# persistent connections with health checks (or a psycopg pool when
+# DB_POOL_MAX_SIZE is set) and per-statement/lock timeouts. Anything else uses
+# SQLite for development, in WAL mode so readers don't block the writer, with
+# write transactions taking the lock up front and waiting DB_SQLITE_TIMEOUT
+# seconds for it instead of failing with "database is locked".
+# The statement timeout is meant for web requests: long-running commands
+# (backups, restores, index rebuilds, generate_data.py) lift it for themselves.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'bookmyshow'),
+            'USER': os.environ.get('DB_USER', 'bookmyshow'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # A pool hands out its own connections, so Django must not keep them
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+                'options': (
+                    f"-c statement_timeout={os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000)}"
+                    f" -c lock_timeout={os.environ.get('DB_LOCK_TIMEOUT_MS', 2000)}"
+                ),
+            },
+        }
     }
-}
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_SQLITE_TIMEOUT', 20)),
+            },
+        }
+    }
+
+
+# Read replicas
+# Catalog views read from these aliases (see bookmyshow.routers); everything
+# else, and any client that wrote in the last REPLICA_STICKY_SECONDS, uses the
+# primary. DB_REPLICA_HOSTS (comma separated) adds Postgres replicas. Locally,
+# DB_REPLICA_PATH points a second SQLite file at the replica alias; refresh it
+# from the primary with `manage.py sync_replica`. Tests mirror the primary.
+
+DATABASE_REPLICAS = []
+
+if DB_ENGINE == 'postgres':
+    for i, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+        DATABASES[f'replica{i}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+        DATABASE_REPLICAS.append(f'replica{i}')
+elif os.environ.get('DB_REPLICA_PATH'):
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.environ['DB_REPLICA_PATH'], 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['bookmyshow.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = 5
 
 
 # Password validation
@@ -156,4 +226,116 @@ SIMPLE_JWT = {
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
-]
\ No newline at end of file
+]
+
+# Cache
+# The catalog version and replica stickiness live here. Deployments with more
+# than one worker process need a shared cache so they look the same to all of
+# them: REDIS_URL selects Redis (needs the 'redis' package) and
+# CACHE_BACKEND=database a database table, created once with
+# `python manage.py createcachetable`. The default is a per-process
+# in-memory cache that needs no setup, for development.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Catalog cache
+# Seconds a page of the movie/cast listings stays cached. Saving a movie or
+# cast member bumps the catalog version, so edits show up immediately in
+# every process sharing the cache. With the per-process default other
+# processes can serve their old pages until they expire, hence the short TTL.
+
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 30 if CACHE_BACKEND == 'locmem' else 300))
+
+
+# Seat availability
+# Seconds before a show's in-memory seat map is rebuilt from the database,
+# so bookings made by other worker processes are eventually reflected.
+
+SEAT_AVAILABILITY_TTL = 30
+
+
+# Seat holds
+# How long a pending booking keeps its seats before `expire_holds` releases them.
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+
+# Booking engine
+# 'locking' locks the requested seats while claiming them; 'optimistic' relies on
+# the (show, seat) unique constraint to detect conflicts and retries transient
+# lock errors up to BOOKING_RETRY_ATTEMPTS times (backoff doubles from
+# BOOKING_RETRY_BACKOFF seconds); 'allocator' queues bookings on a per-show
+# worker thread that decides them in memory and writes them in batches.
+
+BOOKING_ENGINE = 'locking'
+
+BOOKING_RETRY_ATTEMPTS = 3
+
+BOOKING_RETRY_BACKOFF = 0.01
+
+BOOKING_ALLOCATOR_BATCH_SIZE = 50
+
+BOOKING_ALLOCATOR_IDLE = 60  # seconds before an idle show allocator exits
+
+BOOKING_ALLOCATOR_TIMEOUT = 10  # seconds a request waits for its turn
+
+# Allocators running at once per process. Each holds a database connection, so
+# keep this well below DB_POOL_MAX_SIZE; shows beyond it book with 'locking'.
+BOOKING_ALLOCATOR_MAX = 8
+
+
+# Seat events
+# Live seat changes are streamed at /api/bookings/seats/<show_id>/events/ when
+# served by the ASGI application. InProcessBroker only reaches watchers in the
+# publishing process; bookings.events.RelayBroker (OPTIONS: address, heartbeat)
+# goes through the `seat_events_relay` command so all workers see every change.
+
+SEAT_EVENTS = {
+    'BROKER': 'bookings.events.InProcessBroker',
+    'OPTIONS': {},
+    'KEEPALIVE': 15,
+}
+
+
+# Ticket QR codes
+# Tickets are issued in the background after payment, pending until their QR
+# images are rendered into a content-addressed LRU cache by TICKET_QR_WORKERS
+# processes (0 renders on the background thread). Evicted images are rendered
+# again on demand by the ticket QR endpoint.
+
+TICKET_QR_WORKERS = 2
+
+TICKET_QR_CACHE = {
+    'DIR': BASE_DIR / 'qr_cache',
+    'MEMORY_BYTES': 8 * 1024 * 1024,
+    'DISK_BYTES': 256 * 1024 * 1024,
+}
+
+
+# Request metrics
+# Per-endpoint latency/query histograms are served at /api/metrics/ (staff only).
+# Server-Timing headers expose the same numbers per response.
+
+METRICS_SERVER_TIMING = DEBUG
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,6 +10,7 @@ urlpatterns = [
     path('api/movies/', include('movies.urls')),
     path('api/theaters/', include('theaters.urls')),
     path('api/bookings/', include('bookings.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 
@@ -1,21 +1,37 @@
 import os
+import argparse
 import random
+import time
 from datetime import datetime, timedelta
-from django.core.files import File
+from decimal import Decimal
+from itertools import islice
 from io import BytesIO
-from django.utils.text import slugify
+from django.core.files import File
 from PIL import Image
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bookmyshow.settings')
+# Bulk loads run statements far longer than the timeout web requests get
+os.environ.setdefault('DB_STATEMENT_TIMEOUT_MS', '0')
 import django
 django.setup()
 
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils.text import slugify
+from django.utils.timezone import make_aware, now
 from users.models import User
-from theaters.models import Theater, Screen, Show
+from theaters.layout import NO_SEAT, SEAT_TYPE_CODES, encode_runs, row_label
+from theaters.models import Theater, Screen, ScreenLayout, Show
+from theaters.showtimes import rebuild_showtimes
 from movies.models import Movie, CastMember, Review
-from bookings.models import ShowSeatPricing, Seat, Booking, BookedSeat, Payment, Ticket
+from movies.ratings import recompute_ratings
+from movies.search import rebuild_index
+from bookings.models import (
+    ShowSeatPricing, Seat, Booking, BookedSeat, Payment, SeatHold, Ticket, PAYMENT_METHOD_CHOICES
+)
 
-# Constants
+# Defaults (override from the command line, see --help)
 NUM_USERS = 20
 NUM_THEATERS = 5
 NUM_SCREENS_PER_THEATER = 3
@@ -24,112 +40,102 @@ NUM_MOVIES = 10
 NUM_CAST_MEMBERS = 30
 NUM_SHOWS_PER_SCREEN = 5
 NUM_BOOKINGS = 50
+BATCH_SIZE = 5000
+
+# Rows are inserted in batches with bulk_create (or plain INSERTs), so model
+# save() overrides and post_save signals (seat/pricing provisioning, ticket
+# creation) never run; the rows they would have produced are generated here.
+
+rng = random.Random()
+
+SEAT_TYPES = ['regular', 'vip', 'premium']
+PRICE_RANGES = {'regular': (150, 300), 'vip': (300, 500), 'premium': (500, 1000)}
+BOOKING_STATUSES = ['confirmed', 'confirmed', 'confirmed', 'pending', 'cancelled_user']
+PAYMENT_METHODS = [method[0] for method in PAYMENT_METHOD_CHOICES]
 
 # Helper functions
 def random_date(start_date, end_date):
     time_between = end_date - start_date
-    random_days = random.randrange(time_between.days)
+    random_days = rng.randrange(time_between.days)
     return start_date + timedelta(days=random_days)
 
-def random_time():
-    return f"{random.randint(0, 23):02d}:{random.randint(0, 59):02d}"
-
 def create_random_image():
-    image = Image.new('RGB', (100, 100), color=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)))
+    image = Image.new('RGB', (100, 100), color=(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
     buffer = BytesIO()
     image.save(buffer, format='JPEG')
-    return File(buffer, name=f"random_{random.randint(1, 10000)}.jpg")
+    return File(buffer, name=f"random_{rng.randint(1, 10000)}.jpg")
 
-# Create Users
-def create_users():
-    roles = ['user', 'theater_owner', 'movie_owner', 'admin']
-    genders = ['male', 'female', 'other']
-    
-    for i in range(NUM_USERS):
-        role = random.choice(roles)
-        username = f"user{i+1}"
-        email = f"{username}@example.com"
-        
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password='testpass123',
-            role=role,
-            phone=f"{random.randint(7000000000, 9999999999)}",
-            location=f"City {random.randint(1, 10)}",
-            date_of_birth=random_date(datetime(1970, 1, 1), datetime(2005, 1, 1)),
-            gender=random.choice(genders)
-        )
-        
-        if random.random() < 0.3:  # 30% chance to have profile picture
-            user.profile_picture = create_random_image()
-            user.save()
-    
-    print(f"Created {NUM_USERS} users")
+def bulk_insert(model, rows, batch_size):
+    """
+    Insert rows from an iterable in fixed-size batches, so at most one batch
+    is held in memory. Returns the ids of the inserted rows.
+    """
+    ids = []
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+    return ids
 
-# Create Theaters
-def create_theaters():
-    theater_owners = User.objects.filter(role='theater_owner')
-    if not theater_owners.exists():
-        print("No theater owners found. Please create some first.")
+def insert_rows(model, fields, rows):
+    """
+    Plain ``executemany`` INSERT for rows that need no ids back, skipping
+    model instantiation. Values must already be database-ready.
+    """
+    if not rows:
         return
-    
-    cities = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Ahmedabad']
-    
-    for i in range(NUM_THEATERS):
-        owner = random.choice(theater_owners)
-        city = random.choice(cities)
-        
-        Theater.objects.create(
-            name=f"Theater {i+1}",
-            location=f"{city}, {random.choice(['Main Road', 'Mall', 'Downtown', 'Suburb'])}",
-            created_by=owner
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})", rows
         )
-    
-    print(f"Created {NUM_THEATERS} theaters")
 
-# Create Screens
-def create_screens():
-    theaters = Theater.objects.all()
-    if not theaters.exists():
-        print("No theaters found. Please create some first.")
-        return
-    
-    for theater in theaters:
-        for i in range(NUM_SCREENS_PER_THEATER):
-            Screen.objects.create(
-                theater=theater,
-                name=f"Screen {i+1}",
-                created_by=theater.created_by
-            )
-    
-    print(f"Created {NUM_SCREENS_PER_THEATER} screens per theater")
+def log(label, count, started):
+    print(f"Created {count} {label} in {time.perf_counter() - started:.1f}s")
 
-# Create Seats
-def create_seats():
-    screens = Screen.objects.all()
-    if not screens.exists():
-        print("No screens found. Please create some first.")
-        return
-    
-    seat_types = ['regular', 'vip', 'premium']
-    
-    for screen in screens:
-        for i in range(1, NUM_SEATS_PER_SCREEN + 1):
-            row = chr(65 + (i // 10))  # A, B, C, etc.
-            seat_num = i % 10 or 10
-            seat_type = random.choices(seat_types, weights=[70, 20, 10], k=1)[0]
-            
-            Seat.objects.create(
-                screen=screen,
-                seat_number=f"{row}{seat_num}",
-                seat_type=seat_type
+# Create Users
+def create_users(options):
+    started = time.perf_counter()
+    roles = ['user', 'theater_owner', 'movie_owner', 'admin']
+    genders = ['male', 'female', 'other']
+    # Hashing once keeps user creation from being dominated by PBKDF2
+    password = make_password('testpass123')
+
+    def rows():
+        for i in range(options.users):
+            # Guarantee at least one user of every role
+            role = roles[i] if i < len(roles) else rng.choice(roles)
+            username = f"user{i+1}"
+            yield User(
+                username=username,
+                email=f"{username}@example.com",
+                password=password,
+                role=role,
+                is_staff=role == 'admin',
+                is_superuser=role == 'admin',
+                phone=f"{7000000000 + i}",
+                location=f"City {rng.randint(1, 10)}",
+                date_of_birth=random_date(datetime(1970, 1, 1), datetime(2005, 1, 1)).date(),
+                gender=rng.choice(genders),
             )
-    
-    print(f"Created {NUM_SEATS_PER_SCREEN} seats per screen")
+
+    ids = bulk_insert(User, rows(), options.batch_size)
+    log("users", len(ids), started)
+
+    if options.images:
+        for user in User.objects.filter(id__in=rng.sample(ids, len(ids) * 3 // 10)):
+            user.profile_picture = create_random_image()
+            user.save()
+
+    users_by_role = {}
+    for user_id, role in User.objects.filter(id__in=ids).values_list('id', 'role'):
+        users_by_role.setdefault(role, []).append(user_id)
+    return users_by_role
 
 # Create Cast Members
-def create_cast_members():
+def create_cast_members(options):
+    started = time.perf_counter()
     roles = [role[0] for role in CastMember.CAST_ROLE_CHOICES]
     names = [
         "Amitabh Bachchan", "Shah Rukh Khan", "Aamir Khan", "Salman Khan", "Akshay Kumar",
@@ -139,29 +145,17 @@ def create_cast_members():
         "Rajkumar Hirani", "Sanjay Leela Bhansali", "Karan Johar", "Zoya Akhtar", "Anurag Kashyap",
         "A.R. Rahman", "Pritam", "Vishal-Shekhar", "Shankar-Ehsaan-Loy", "Amit Trivedi"
     ]
-    
-    for i in range(NUM_CAST_MEMBERS):
-        name = random.choice(names)
-        role = random.choice(roles)
-        
-        cast_member = CastMember.objects.create(
-            name=name,
-            role=role
-        )
-        
-        if random.random() < 0.5:  # 50% chance to have profile picture
-            cast_member.profile_picture = create_random_image()
-            cast_member.save()
-    
-    print(f"Created {NUM_CAST_MEMBERS} cast members")
+
+    ids = bulk_insert(CastMember, (
+        CastMember(name=rng.choice(names), role=rng.choice(roles))
+        for _ in range(options.cast)
+    ), options.batch_size)
+    log("cast members", len(ids), started)
+    return ids
 
 # Create Movies
-def create_movies():
-    movie_owners = User.objects.filter(role='movie_owner')
-    if not movie_owners.exists():
-        print("No movie owners found. Please create some first.")
-        return
-    
+def create_movies(options, movie_owners, cast_ids):
+    started = time.perf_counter()
     languages = ['Hindi', 'English', 'Tamil', 'Telugu', 'Malayalam', 'Kannada', 'Bengali', 'Marathi']
     genres = ['Action', 'Comedy', 'Drama', 'Romance', 'Thriller', 'Horror', 'Sci-Fi', 'Fantasy']
     titles = [
@@ -170,190 +164,307 @@ def create_movies():
         "Lost Treasure", "Final Journey", "Eternal Love", "Broken Promises", "Hidden Truths",
         "The Forgotten", "Shadows of the Past", "Tomorrow Never Comes", "Echoes of Time", "Fading Memories"
     ]
-    
-    cast_members = list(CastMember.objects.all())
-    
-    for i in range(NUM_MOVIES):
-        owner = random.choice(movie_owners)
-        title = random.choice(titles)
-        
-        # Generate a unique title by adding a random number if needed
-        base_title = f"{title} {random.randint(1, 100)}" if random.random() < 0.3 else title
-        
-        # Create the movie without saving to generate slug first
-        movie = Movie(
-            title=base_title,
-            description=f"A {random.choice(genres)} movie about {random.choice(['love', 'betrayal', 'friendship', 'revenge', 'redemption'])}.",
-            language=random.choice(languages),
-            genre=random.choice(genres),
-            duration=random.randint(90, 180),
-            rating=round(random.uniform(3.0, 5.0), 1),
-            release_date=random_date(datetime(2020, 1, 1), datetime(2023, 12, 31)),
-            created_by=owner
-        )
-        
-        # Manually generate a unique slug
-        if not movie.slug:
-            movie.slug = slugify(base_title)
-            while Movie.objects.filter(slug=movie.slug).exists():
-                movie.slug = f"{slugify(base_title)}-{random.randint(1, 1000)}"
-        
-        # Save the movie
-        movie.save()
-        
-        # Add random cast members
-        num_cast = random.randint(3, 8)
-        movie.cast.set(random.sample(cast_members, num_cast))
-        
-        if random.random() < 0.7:  # 70% chance to have poster
-            movie.poster = create_random_image()
-            movie.save()
-    
-    print(f"Created {NUM_MOVIES} movies")
-# Create Shows
-def create_shows():
-    screens = Screen.objects.all()
-    movies = Movie.objects.all()
-    if not screens.exists() or not movies.exists():
-        print("No screens or movies found. Please create some first.")
-        return
-    
-    for screen in screens:
-        for i in range(NUM_SHOWS_PER_SCREEN):
-            show_date = random_date(datetime.now().date(), datetime.now().date() + timedelta(days=30))
-            show_time = datetime.combine(show_date, datetime.strptime(random_time(), "%H:%M").time())
-            
-            Show.objects.create(
-                screen=screen,
-                movie=random.choice(movies),
-                show_time=show_time,
-                created_by=screen.created_by
+
+    def rows():
+        for i in range(options.movies):
+            title = rng.choice(titles)
+            title = f"{title} {i + 1}" if i >= len(titles) or rng.random() < 0.3 else title
+            yield Movie(
+                title=title,
+                # The index keeps slugs unique without a lookup per movie
+                slug=f"{slugify(title)}-{i + 1}",
+                description=f"A {rng.choice(genres)} movie about {rng.choice(['love', 'betrayal', 'friendship', 'revenge', 'redemption'])}.",
+                language=rng.choice(languages),
+                genre=rng.choice(genres),
+                duration=rng.randint(90, 180),
+                rating=Decimal(str(round(rng.uniform(3.0, 5.0), 1))),
+                release_date=random_date(datetime(2020, 1, 1), datetime(2023, 12, 31)).date(),
+                created_by_id=rng.choice(movie_owners),
             )
-    
-    print(f"Created {NUM_SHOWS_PER_SCREEN} shows per screen")
-
-# Create Show Seat Pricing
-def create_show_seat_pricing():
-    shows = Show.objects.all()
-    if not shows.exists():
-        print("No shows found. Please create some first.")
-        return
-    
-    for show in shows:
-        ShowSeatPricing.objects.create(
-            show=show,
-            seat_type='regular',
-            price=random.randint(150, 300)
-        )
-        ShowSeatPricing.objects.create(
-            show=show,
-            seat_type='vip',
-            price=random.randint(300, 500)
+
+    ids = bulk_insert(Movie, rows(), options.batch_size)
+
+    # Random cast members per movie, written straight to the M2M through table
+    MovieCast = Movie.cast.through
+    bulk_insert(MovieCast, (
+        MovieCast(movie_id=movie_id, castmember_id=cast_id)
+        for movie_id in ids
+        for cast_id in rng.sample(cast_ids, min(len(cast_ids), rng.randint(3, 8)))
+    ), options.batch_size)
+    log("movies", len(ids), started)
+
+    if options.images:
+        for movie in Movie.objects.filter(id__in=ids):
+            if rng.random() < 0.7:  # 70% chance to have poster
+                movie.poster = create_random_image()
+                movie.save()
+
+    # Bulk inserts skip the signals that keep the search index current
+    started = time.perf_counter()
+    _, keys = rebuild_index()
+    log("search keys", keys, started)
+    return ids
+
+# Create Theaters
+def create_theaters(options, theater_owners):
+    started = time.perf_counter()
+    cities = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Ahmedabad']
+
+    ids = bulk_insert(Theater, (
+        Theater(
+            name=f"Theater {i+1}",
+            slug=f"theater-{i+1}",
+            location=f"{rng.choice(cities)}, {rng.choice(['Main Road', 'Mall', 'Downtown', 'Suburb'])}",
+            created_by_id=rng.choice(theater_owners),
         )
-        ShowSeatPricing.objects.create(
-            show=show,
-            seat_type='premium',
-            price=random.randint(500, 1000)
+        for i in range(options.theaters)
+    ), options.batch_size)
+    log("theaters", len(ids), started)
+    return ids
+
+# Create Screens
+def create_screens(options, theater_ids):
+    started = time.perf_counter()
+    owners = dict(Theater.objects.filter(id__in=theater_ids).values_list('id', 'created_by_id'))
+
+    ids = bulk_insert(Screen, (
+        Screen(
+            theater_id=theater_id,
+            name=f"Screen {i+1}",
+            slug=f"theater-{theater_id}-screen-{i+1}",
+            created_by_id=owners[theater_id],
         )
-    
-    print("Created seat pricing for all shows")
+        for theater_id in theater_ids
+        for i in range(options.screens_per_theater)
+    ), options.batch_size)
+    log("screens", len(ids), started)
+    return ids
+
+# Create Seats
+def create_seats(options, screen_ids):
+    """
+    Returns ``{screen_id: [(seat_id, seat_type), ...]}`` in seat order so
+    bookings can pick seats in memory. Each screen also gets a ScreenLayout
+    with rows of 10 seats.
+    """
+    started = time.perf_counter()
+    columns = min(10, options.seats_per_screen)
+    rows = -(-options.seats_per_screen // columns)
+    layouts = []
+
+    def seat_rows():
+        for screen_id in screen_ids:
+            codes = []
+            for i in range(1, options.seats_per_screen + 1):
+                # Numbered like the layout numbers them (..., Z, AA, AB, ...)
+                row = row_label((i - 1) // columns)
+                seat_num = (i - 1) % columns + 1
+                seat_type = rng.choices(SEAT_TYPES, weights=[70, 20, 10], k=1)[0]
+                codes.append(SEAT_TYPE_CODES[seat_type])
+                yield Seat(screen_id=screen_id, seat_number=f"{row}{seat_num}", seat_type=seat_type)
+            codes.append(NO_SEAT * (rows * columns - len(codes)))
+            layouts.append(ScreenLayout(screen_id=screen_id, rows=rows, columns=columns,
+                                        seat_types=encode_runs(''.join(codes))))
+
+    bulk_insert(Seat, seat_rows(), options.batch_size)
+    bulk_insert(ScreenLayout, layouts, options.batch_size)
+
+    seats = {}
+    for seat_id, screen_id, seat_type in Seat.objects.filter(
+        screen_id__in=screen_ids
+    ).order_by('id').values_list('id', 'screen_id', 'seat_type').iterator(chunk_size=options.batch_size):
+        seats.setdefault(screen_id, []).append((seat_id, seat_type))
+    log("seats", sum(len(s) for s in seats.values()), started)
+    return seats
+
+# Create Shows and Show Seat Pricing
+def create_shows(options, screen_ids, movie_ids):
+    """
+    Returns ``[(show_id, screen_id, {seat_type: price}), ...]``.
+    """
+    started = time.perf_counter()
+    owners = dict(Screen.objects.filter(id__in=screen_ids).values_list('id', 'created_by_id'))
+    today = datetime.now().date()
+
+    plan = []
+    for screen_id in screen_ids:
+        for _ in range(options.shows_per_screen):
+            show_date = random_date(today, today + timedelta(days=30))
+            show_time = make_aware(datetime.combine(show_date, datetime.min.time()) + timedelta(
+                hours=rng.randint(0, 23), minutes=rng.randint(0, 59)
+            ))
+            plan.append((screen_id, show_time))
+
+    show_ids = bulk_insert(Show, (
+        Show(screen_id=screen_id, movie_id=rng.choice(movie_ids), show_time=show_time,
+             created_by_id=owners[screen_id])
+        for screen_id, show_time in plan
+    ), options.batch_size)
+
+    shows = [
+        (show_id, screen_id, {
+            seat_type: rng.randint(*PRICE_RANGES[seat_type]) for seat_type in SEAT_TYPES
+        })
+        for show_id, (screen_id, _) in zip(show_ids, plan)
+    ]
+    bulk_insert(ShowSeatPricing, (
+        ShowSeatPricing(show_id=show_id, seat_type=seat_type, price=price)
+        for show_id, _, prices in shows
+        for seat_type, price in prices.items()
+    ), options.batch_size)
+    log("shows with seat pricing", len(shows), started)
+
+    # Bulk inserts skip the signals that fill the showtime table
+    started = time.perf_counter()
+    log("showtimes", rebuild_showtimes(), started)
+    return shows
 
 # Create Bookings
-def create_bookings():
-    users = User.objects.filter(role='user')
-    shows = Show.objects.all()
-    if not users.exists() or not shows.exists():
-        print("No users or shows found. Please create some first.")
-        return
-    
-    for i in range(NUM_BOOKINGS):
-        user = random.choice(users)
-        show = random.choice(shows)
-        seats = Seat.objects.filter(screen=show.screen).order_by('?')[:random.randint(1, 5)]
-        
-        if not seats.exists():
-            continue
-        
-        total_price = sum(seat.get_price(show) for seat in seats)
-        
-        booking = Booking.objects.create(
-            user=user,
-            show=show,
-            total_price=total_price,
-            status=random.choice(['confirmed', 'confirmed', 'confirmed', 'pending', 'cancelled_user'])
-        )
-        
-        booking.seats.set(seats)
-        
-        # Create BookedSeat entries
-        for seat in seats:
-            BookedSeat.objects.create(
-                show=show,
-                seat=seat,
-                booking=booking
-            )
-        
-        # Create Payment if booking is confirmed
-        if booking.status == 'confirmed':
-            payment_methods = [method[0] for method in Payment.PAYMENT_METHOD_CHOICES]
-            Payment.objects.create(
-                booking=booking,
-                amount=total_price,
-                status='success',
-                payment_method=random.choice(payment_methods),
-                transaction_id=f"TXN{random.randint(1000000000, 9999999999)}",
-                paid_at=booking.booked_at + timedelta(minutes=random.randint(1, 30))
-            )
-    
-    print(f"Created {NUM_BOOKINGS} bookings")
+def create_bookings(options, user_ids, shows, seats_by_screen):
+    """
+    Seats are picked as contiguous free blocks from the in-memory seat list,
+    searched in a per-show bitmap of taken seats, instead of ORDER BY RANDOM().
+    Each batch of bookings is one transaction; their seats, payments and
+    tickets need no ids back, so they skip the ORM and go in as plain rows.
+    """
+    started = time.perf_counter()
+    taken = {}
+    created = ticket_number = 0
+    BookingSeat = Booking.seats.through
+
+    def plan_booking():
+        for _ in range(20):  # a few other shows if the picked one is full
+            show_id, screen_id, prices = rng.choice(shows)
+            seats = seats_by_screen[screen_id]
+            count = min(len(seats), rng.randint(1, 5))
+            bitmap = taken.setdefault(show_id, bytearray(len(seats)))
+            # First free block at or after a random position, wrapping around
+            block = b'\x00' * count
+            start = bitmap.find(block, rng.randrange(len(seats) - count + 1))
+            if start == -1:
+                start = bitmap.find(block)
+            if start != -1:
+                bitmap[start:start + count] = b'\x01' * count
+                return show_id, prices, seats[start:start + count]
+        return None
+
+    remaining = options.bookings
+    while remaining > 0:
+        plans = []
+        while len(plans) < min(remaining, options.batch_size):
+            planned = plan_booking()
+            if planned is None:
+                break
+            plans.append(planned + (rng.choice(user_ids), rng.choice(BOOKING_STATUSES)))
+        if not plans:
+            print("No free seats left for more bookings")
+            break
+
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    user_id=user_id,
+                    show_id=show_id,
+                    total_price=sum(prices[seat_type] for _, seat_type in seats),
+                    status=status,
+                    is_cancelled=status == 'cancelled_user',
+                )
+                for show_id, prices, seats, user_id, status in plans
+            ])
+
+            paid_at = connection.ops.adapt_datetimefield_value(now())
+            # Pending bookings hold their seats until expire_holds releases them
+            hold_until = connection.ops.adapt_datetimefield_value(now() + settings.SEAT_HOLD_TTL)
+            booking_seats, booked_seats, payments, tickets, holds = [], [], [], [], []
+            for booking, (show_id, _, seats, _, status) in zip(bookings, plans):
+                for seat_id, _ in seats:
+                    booking_seats.append((booking.pk, seat_id))
+                    if status != 'cancelled_user':
+                        booked_seats.append((show_id, seat_id, booking.pk))
+                    if status == 'confirmed':
+                        ticket_number += 1
+                        tickets.append((booking.pk, seat_id, show_id, f"{ticket_number:012X}", paid_at, 'ready'))
+                if status == 'pending':
+                    holds.append((booking.pk, hold_until))
+                # Create Payment if booking is confirmed
+                if status == 'confirmed':
+                    payments.append((
+                        booking.pk, str(booking.total_price), 'success', rng.choice(PAYMENT_METHODS),
+                        f"TXN{booking.pk:010d}", paid_at,
+                    ))
+
+            insert_rows(BookingSeat, ['booking', 'seat'], booking_seats)
+            insert_rows(BookedSeat, ['show', 'seat', 'booking'], booked_seats)
+            insert_rows(Payment, ['booking', 'amount', 'status', 'payment_method', 'transaction_id', 'paid_at'], payments)
+            insert_rows(Ticket, ['booking', 'seat', 'show', 'ticket_code', 'issued_at', 'qr_status'], tickets)
+            insert_rows(SeatHold, ['booking', 'expires_at'], holds)
+
+        created += len(bookings)
+        remaining -= len(bookings)
+        print(f"  ... {created} bookings", end='\r')
+    print()
+    log("bookings", created, started)
 
 # Create Reviews
-def create_reviews():
-    users = User.objects.filter(role='user')
-    movies = Movie.objects.all()
-    if not users.exists() or not movies.exists():
-        print("No users or movies found. Please create some first.")
-        return
-    
-    for movie in movies:
-        num_reviews = random.randint(3, 10)
-        reviewers = random.sample(list(users), min(num_reviews, users.count()))
-        
-        for user in reviewers:
-            Review.objects.create(
-                movie=movie,
-                user=user,
-                rating=random.randint(1, 5),
-                comment=random.choice([
-                    "Great movie!",
-                    "Could be better.",
-                    "Loved the performances.",
-                    "The story was weak.",
-                    "Amazing cinematography.",
-                    "Not worth the hype.",
-                    "One of the best this year!",
-                    "Would watch again."
-                ])
-            )
-    
-    print("Created reviews for movies")
+def create_reviews(options, user_ids, movie_ids):
+    started = time.perf_counter()
+    comments = [
+        "Great movie!",
+        "Could be better.",
+        "Loved the performances.",
+        "The story was weak.",
+        "Amazing cinematography.",
+        "Not worth the hype.",
+        "One of the best this year!",
+        "Would watch again."
+    ]
+
+    def rows():
+        for movie_id in movie_ids:
+            num_reviews = rng.randint(3, 10)
+            for user_id in rng.sample(user_ids, min(num_reviews, len(user_ids))):
+                yield Review(movie_id=movie_id, user_id=user_id, rating=rng.randint(1, 5),
+                             comment=rng.choice(comments))
+
+    ids = bulk_insert(Review, rows(), options.batch_size)
+    log("reviews", len(ids), started)
+
+    started = time.perf_counter()
+    log("movie rating aggregates", recompute_ratings(), started)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset with bulk inserts.")
+    parser.add_argument('--users', type=int, default=NUM_USERS)
+    parser.add_argument('--theaters', type=int, default=NUM_THEATERS)
+    parser.add_argument('--screens-per-theater', type=int, default=NUM_SCREENS_PER_THEATER)
+    parser.add_argument('--seats-per-screen', type=int, default=NUM_SEATS_PER_SCREEN)
+    parser.add_argument('--movies', type=int, default=NUM_MOVIES)
+    parser.add_argument('--cast', type=int, default=NUM_CAST_MEMBERS)
+    parser.add_argument('--shows-per-screen', type=int, default=NUM_SHOWS_PER_SCREEN)
+    parser.add_argument('--bookings', type=int, default=NUM_BOOKINGS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=42, help="Seed for a reproducible dataset")
+    parser.add_argument('--images', action='store_true', help="Attach random profile pictures and posters")
+    return parser.parse_args()
 
 # Main function to run all generators
-def generate_all_data():
+def generate_all_data(options):
     print("Starting data generation...")
-    
-    create_users()
-    create_cast_members()
-    create_movies()
-    create_theaters()
-    create_screens()
-    create_seats()
-    create_shows()
-    create_show_seat_pricing()
-    create_bookings()
-    create_reviews()
-    
-    print("Data generation completed!")
+    rng.seed(options.seed)
+    started = time.perf_counter()
+
+    users_by_role = create_users(options)
+    regular_users = users_by_role.get('user', [])
+    cast_ids = create_cast_members(options)
+    movie_ids = create_movies(options, users_by_role['movie_owner'], cast_ids)
+    theater_ids = create_theaters(options, users_by_role['theater_owner'])
+    screen_ids = create_screens(options, theater_ids)
+    seats_by_screen = create_seats(options, screen_ids)
+    shows = create_shows(options, screen_ids, movie_ids)
+    create_bookings(options, regular_users, shows, seats_by_screen)
+    create_reviews(options, regular_users, movie_ids)
+
+    print(f"Data generation completed in {time.perf_counter() - started:.1f}s!")
 
 if __name__ == '__main__':
-    generate_all_data()
\ No newline at end of file
+    generate_all_data(parse_args())
@@ -1,4 +1,6 @@
 from django.contrib import admin, messages
+from django.db import transaction
+from . import ratings
 from .models import Movie, CastMember, Review
 
 class SoftDeleteAdmin(admin.ModelAdmin):
@@ -16,11 +18,19 @@ class SoftDeleteAdmin(admin.ModelAdmin):
 
     @admin.action(description="Restore selected soft-deleted items")
     def restore_objects(self, request, queryset):
-        restored = queryset.update(is_deleted=False)
+        # Saved one by one so signals (search index, listing cache) see the restore
+        restored = 0
+        for obj in queryset.filter(is_deleted=True):
+            restored += self.restore(obj)
         self.message_user(request, f"{restored} item(s) successfully restored.", messages.SUCCESS)
         if not restored:
             self.message_user(request, "No items were restored.", messages.WARNING)
 
+    def restore(self, obj):
+        obj.is_deleted = False
+        obj.save(update_fields=['is_deleted'])
+        return True
+
 
 # 🔹 Movie Admin
 @admin.register(Movie)
@@ -29,6 +39,8 @@ class MovieAdmin(SoftDeleteAdmin):
     search_fields = ('title', 'genre', 'language', 'cast__name')
     list_filter = ('genre', 'language', 'release_date', 'is_deleted')
     autocomplete_fields = ['cast']
+    readonly_fields = ('review_count', 'review_rating_sum', 'review_count_1', 'review_count_2',
+                       'review_count_3', 'review_count_4', 'review_count_5')
 
 # 🔹 Cast Member Admin
 @admin.register(CastMember)
@@ -43,3 +55,35 @@ class ReviewAdmin(SoftDeleteAdmin):
     list_display = ('movie', 'user', 'rating', 'created_at', 'is_deleted')
     list_filter = ('rating', 'created_at', 'is_deleted')
     search_fields = ('movie__title', 'user__username')
+
+    # Every change to an active review goes through movies.ratings so the
+    # movie's review aggregates stay in step
+    def restore(self, obj):
+        with transaction.atomic():
+            if not Review.all_objects.filter(pk=obj.pk, is_deleted=True).update(is_deleted=False):
+                return False
+            ratings.review_added(obj)
+        return True
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = Review.all_objects.select_for_update().filter(pk=obj.pk).first() if change else None
+            super().save_model(request, obj, form, change)
+            was_active = old is not None and not old.is_deleted
+            if was_active and not obj.is_deleted and old.movie_id == obj.movie_id:
+                ratings.review_rating_changed(obj, old.rating)
+                return
+            if was_active:
+                ratings.review_removed(old)
+            if not obj.is_deleted:
+                ratings.review_added(obj)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Review.all_objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            active = list(queryset.select_for_update().filter(is_deleted=False))
+            queryset.delete()
+            for review in active:
+                ratings.review_removed(review)
@@ -0,0 +1,61 @@
+"""
+Versioned cache for the public catalog listings.
+
+Every cached page is keyed by the current catalog version, and saving a
+movie or cast member bumps that version once the transaction commits.
+Pages cached under an older version are no longer looked up and simply
+expire, so invalidation is a single ``incr`` instead of a key scan.
+
+With a shared cache (see ``CACHES``) a bump reaches every worker process
+at once. With the per-process default, other processes keep serving their
+pages until ``CATALOG_CACHE_TTL`` runs out. A version evicted from the cache starts
+again from the current time rather than from 1, so it can't match pages
+cached before the eviction.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from bookmyshow.routers import primary_reads
+
+VERSION_KEY = 'movies:catalog-version'
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        initial = _initial_version()
+        cache.add(VERSION_KEY, initial, timeout=None)
+        version = cache.get(VERSION_KEY, initial)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+
+
+class CachedListMixin:
+    """
+    List responses are cached per full URL (cursor and page size included).
+    Pages are always rendered from the primary before being cached: a
+    lagging replica could otherwise store an old page under the new version.
+    """
+    cache_prefix = None
+
+    def list(self, request, *args, **kwargs):
+        key = f"movies:{self.cache_prefix}:v{catalog_version()}:{request.build_absolute_uri()}"
+        data = cache.get(key)
+        if data is None:
+            with primary_reads():
+                data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, getattr(settings, 'CATALOG_CACHE_TTL', 300))
+        return Response(data)
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from bookmyshow.db import lift_statement_timeout
+from movies.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the movie search index from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Movies indexed per batch")
+
+    def handle(self, *args, **kwargs):
+        lift_statement_timeout()
+        started = time.perf_counter()
+        movies, keys = rebuild_index(batch_size=kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Indexed {movies} movies as {keys} search keys in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from bookmyshow.db import lift_statement_timeout
+from movies.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute every movie's review count, rating sum and histogram from active reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Movies updated per query")
+
+    def handle(self, *args, **kwargs):
+        lift_statement_timeout()
+        started = time.perf_counter()
+        updated = recompute_ratings(batch_size=kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Recomputed ratings of {updated} reviewed movies in {time.perf_counter() - started:.1f}s"
+        ))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from functools import partial
 from .utils import upload_file_with_timestamp
 
@@ -55,9 +56,17 @@ class CastMember(models.Model):
     objects = CastMemberManager()
     all_objects = models.Manager()
 
+    class Meta:
+        # Partial: the listing only ever reads live rows, in cursor order
+        indexes = [models.Index(fields=['name', 'id'], condition=models.Q(is_deleted=False),
+                                name='movies_cast_live_name')]
+
     def __str__(self):
         return f"{self.name} ({self.role})"
 
+# Only ever written by movies.ratings, with UPDATE ... SET x = x + n
+REVIEW_AGGREGATE_FIELDS = ['review_count', 'review_rating_sum'] + [f'review_count_{stars}' for stars in range(1, 6)]
+
 class Movie(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -74,22 +83,50 @@ class Movie(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     slug = models.SlugField(max_length=255, unique=True)
     is_deleted = models.BooleanField(default=False)
+
+    # Aggregates of active reviews, maintained by movies.ratings
+    review_count = models.PositiveIntegerField(default=0)
+    review_rating_sum = models.PositiveIntegerField(default=0)
+    review_count_1 = models.PositiveIntegerField(default=0)
+    review_count_2 = models.PositiveIntegerField(default=0)
+    review_count_3 = models.PositiveIntegerField(default=0)
+    review_count_4 = models.PositiveIntegerField(default=0)
+    review_count_5 = models.PositiveIntegerField(default=0)
     
     objects = MovieManager()
     all_objects = models.Manager() 
+
+    class Meta:
+        indexes = [models.Index(fields=['-release_date', '-id'], condition=models.Q(is_deleted=False),
+                                name='movies_movie_live_release')]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.title.lower().replace(' ', '-')
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Our copy of the review aggregates may be behind: don't write it back
+            skipped = set(REVIEW_AGGREGATE_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.attname not in skipped]
         super().save(*args, **kwargs)
 
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.review_rating_sum / self.review_count, 1)
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'review_count_{stars}') for stars in range(1, 6)}
+
     def __str__(self):
         return self.title
 
 class Review(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    rating = models.PositiveSmallIntegerField()
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -100,6 +137,25 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('movie', 'user')
+        indexes = [models.Index(fields=['movie', '-created_at', '-id'], condition=models.Q(is_deleted=False),
+                                name='movies_review_live_recent')]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.movie.title} ({self.rating}★)"
+
+class SearchKey(models.Model):
+    """
+    Inverted index entry for movie search: a word, or a prefix of one, found
+    in a movie's title, cast, genre, language or description, with the best
+    weight it scored there. Maintained by ``movies.search``.
+    """
+    key = models.CharField(max_length=20)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='search_keys')
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('key', 'movie')
+        indexes = [models.Index(fields=['key', '-weight'], name='movies_searchkey_rank')]
 
     def __str__(self):
-        return f"{self.user.username} - {self.movie.title} ({self.rating}★)"
\ No newline at end of file
+        return f"{self.key} → {self.movie_id} ({self.weight})"
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class MovieCursorPagination(CatalogCursorPagination):
+    ordering = ('-release_date', '-id')
+
+
+class CastMemberCursorPagination(CatalogCursorPagination):
+    ordering = ('name', 'id')
+
+
+class ReviewCursorPagination(CatalogCursorPagination):
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,72 @@
+"""
+Per-movie review aggregates (``Movie.review_*``).
+
+Review views report each change as a delta, applied with a single
+``UPDATE ... SET x = x + n`` so concurrent reviews never lose counts and no
+listing has to aggregate ``Review``. ``recompute_ratings`` rebuilds them
+from scratch for bulk loads or repairs.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .cache import bump_catalog_version
+from .models import REVIEW_AGGREGATE_FIELDS, Movie, Review
+
+STARS = range(1, 6)
+
+
+def _apply(movie_id, changes):
+    """``changes`` is a list of ``(rating, +1/-1)`` pairs."""
+    counts = {}
+    for rating, delta in changes:
+        counts[rating] = counts.get(rating, 0) + delta
+    counts = {rating: delta for rating, delta in counts.items() if delta}
+    if not counts:
+        return
+
+    fields = {f'review_count_{rating}': F(f'review_count_{rating}') + delta for rating, delta in counts.items()}
+    fields['review_count'] = F('review_count') + sum(counts.values())
+    fields['review_rating_sum'] = F('review_rating_sum') + sum(rating * delta for rating, delta in counts.items())
+    Movie.all_objects.filter(pk=movie_id).update(**fields)
+    # Listings show the aggregates but update() sends no post_save
+    transaction.on_commit(bump_catalog_version)
+
+
+def review_added(review):
+    _apply(review.movie_id, [(review.rating, 1)])
+
+
+def review_removed(review):
+    _apply(review.movie_id, [(review.rating, -1)])
+
+
+def review_rating_changed(review, old_rating):
+    _apply(review.movie_id, [(old_rating, -1), (review.rating, 1)])
+
+
+def recompute_ratings(batch_size=1000):
+    """Recompute the aggregates of every movie from active reviews. Returns movies updated."""
+    fields = REVIEW_AGGREGATE_FIELDS
+    aggregates = Review.objects.values('movie_id').annotate(
+        count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS},
+    ).order_by('movie_id')
+
+    with transaction.atomic():
+        Movie.all_objects.update(**dict.fromkeys(fields, 0))
+        movies = []
+        updated = 0
+        for row in aggregates.iterator(chunk_size=batch_size):
+            movie = Movie(id=row['movie_id'], review_count=row['count'], review_rating_sum=row['rating_sum'])
+            for stars in STARS:
+                setattr(movie, f'review_count_{stars}', row[f'stars_{stars}'])
+            movies.append(movie)
+            if len(movies) == batch_size:
+                updated += len(movies)
+                Movie.all_objects.bulk_update(movies, fields)
+                movies = []
+        Movie.all_objects.bulk_update(movies, fields)
+        updated += len(movies)
+        transaction.on_commit(bump_catalog_version)
+    return updated
@@ -0,0 +1,150 @@
+"""
+Movie search over a persisted inverted index (``SearchKey``).
+
+Words of a movie's title, cast names, genre and language are indexed along
+with every prefix of at least ``MIN_PREFIX`` characters, so typeahead
+queries are exact key lookups served in weight order from the
+``(key, -weight)`` index. Description words are indexed whole only.
+
+A query is ranked by summing, per movie, the weight of each of its words.
+Each word reads at most ``CANDIDATES`` best-weighted matches. If one of
+those lists is complete it bounds the result exactly; otherwise every word
+is common and the best matches of all words are the candidates. Either way
+a query costs a handful of indexed lookups however large the catalog is.
+"""
+import re
+import unicodedata
+
+from django.db import connection, transaction
+
+from .models import Movie, SearchKey
+
+MIN_PREFIX = 2
+MAX_KEY_LENGTH = 20
+MAX_QUERY_WORDS = 5
+CANDIDATES = 200
+
+# Weight of a prefix match per field; a whole-word match counts double
+FIELD_WEIGHTS = {
+    'title': 8,
+    'cast': 4,
+    'genre': 3,
+    'language': 2,
+    'description': 1,
+}
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'her', 'his', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'she', 'that', 'the', 'their', 'they', 'this', 'to', 'was', 'who', 'with',
+}
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase ASCII words of ``text``, accents stripped, cut to ``MAX_KEY_LENGTH``."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return [word[:MAX_KEY_LENGTH] for word in _WORD.findall(text)]
+
+
+def movie_keys(movie, cast_names):
+    """Return ``{key: weight}`` for a movie."""
+    keys = {}
+
+    def add(text, field, prefixes=True):
+        weight = FIELD_WEIGHTS[field]
+        for word in tokenize(text):
+            if not prefixes and (len(word) < MIN_PREFIX or word in STOP_WORDS):
+                continue
+            keys[word] = max(keys.get(word, 0), weight * 2)
+            if prefixes:
+                for end in range(MIN_PREFIX, len(word)):
+                    prefix = word[:end]
+                    keys[prefix] = max(keys.get(prefix, 0), weight)
+
+    add(movie.title, 'title')
+    for name in cast_names:
+        add(name, 'cast')
+    add(movie.genre, 'genre')
+    add(movie.language, 'language')
+    add(movie.description, 'description', prefixes=False)
+    return keys
+
+
+def _insert_keys(movies):
+    """Insert the keys of ``movies``; plain tuples, as there can be millions."""
+    rows = [
+        (key, movie.id, weight)
+        for movie in movies
+        for key, weight in movie_keys(movie, [member.name for member in movie.cast.all()]).items()
+    ]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in ('key', 'movie_id', 'weight'))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(SearchKey._meta.db_table)} ({columns}) VALUES (%s, %s, %s)", rows
+        )
+    return len(rows)
+
+
+def reindex_movies(movie_ids):
+    """Rebuild the keys of the given movies; deleted movies end up with none."""
+    movie_ids = list(movie_ids)
+    movies = Movie.objects.filter(id__in=movie_ids).prefetch_related('cast')
+    with transaction.atomic():
+        SearchKey.objects.filter(movie_id__in=movie_ids).delete()
+        _insert_keys(movies)
+
+
+def rebuild_index(batch_size=1000):
+    """Rebuild the whole index. Returns ``(movies, keys)`` indexed."""
+    movie_count = key_count = 0
+    with transaction.atomic():
+        SearchKey.objects.all().delete()
+        queryset = Movie.objects.order_by('id').prefetch_related('cast')
+        batch = []
+        for movie in queryset.iterator(chunk_size=batch_size):
+            batch.append(movie)
+            if len(batch) == batch_size:
+                key_count += _insert_keys(batch)
+                movie_count += len(batch)
+                batch = []
+        key_count += _insert_keys(batch)
+        movie_count += len(batch)
+    return movie_count, key_count
+
+
+def search(query, limit=10):
+    """Return up to ``limit`` ``(movie_id, score)`` pairs, best first."""
+    words = list(dict.fromkeys(word for word in tokenize(query) if len(word) >= MIN_PREFIX))[:MAX_QUERY_WORDS]
+    if not words:
+        return []
+
+    # Best-weighted matches of each word; a list shorter than the cap is complete
+    matches = {
+        word: dict(
+            SearchKey.objects.filter(key=word).order_by('-weight').values_list('movie_id', 'weight')[:CANDIDATES + 1]
+        )
+        for word in words
+    }
+    complete = [word for word in words if len(matches[word]) <= CANDIDATES]
+    if complete:
+        # Every movie matching all words is in the smallest complete list
+        candidates = set(min((matches[word] for word in complete), key=len))
+    else:
+        candidates = set().union(*matches.values())
+
+    scores = dict.fromkeys(candidates, 0)
+    for word in words:
+        weights = matches[word]
+        if len(weights) > CANDIDATES:
+            missing = [movie_id for movie_id in scores if movie_id not in weights]
+            if missing:
+                weights = {**weights, **dict(
+                    SearchKey.objects.filter(key=word, movie_id__in=missing).values_list('movie_id', 'weight')
+                )}
+        scores = {movie_id: score + weights[movie_id] for movie_id, score in scores.items() if movie_id in weights}
+        if not scores:
+            return []
+
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
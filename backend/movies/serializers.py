@@ -13,15 +13,29 @@ class CastMemberSerializer(serializers.ModelSerializer):
 class MovieSerializer(serializers.ModelSerializer):
     cast = CastMemberSerializer(many=True, read_only=True)
     created_by = serializers.CharField(source='created_by.username', read_only=True)
+    # Served from the movie row's review aggregates, no join needed
+    average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Movie
         fields = [
             'id', 'title', 'slug', 'description', 'language', 'genre',
             'duration', 'rating', 'cast', 'release_date', 'poster',
-            'created_by'
+            'created_by', 'review_count', 'average_rating', 'rating_histogram'
         ]
-        read_only_fields = ['slug', 'created_by_id', 'created_by_username']
+        read_only_fields = ['slug', 'created_by_id', 'created_by_username', 'review_count']
+
+
+class MovieSearchResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Movie
+        fields = ['id', 'title', 'slug', 'language', 'genre', 'release_date', 'poster', 'review_count']
+
+
+class MovieSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
 
 
 class MovieCreateUpdateSerializer(serializers.ModelSerializer):
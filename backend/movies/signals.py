@@ -0,0 +1,46 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .cache import bump_catalog_version
+from .models import CastMember, Movie
+from .search import reindex_movies
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=CastMember)
+@receiver(post_delete, sender=CastMember)
+@receiver(m2m_changed, sender=Movie.cast.through)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# 🔹 Keep the search index up to date (soft deletes are saves too)
+@receiver(post_save, sender=Movie)
+def index_movie(sender, instance, **kwargs):
+    transaction.on_commit(partial(reindex_movies, [instance.pk]))
+
+
+@receiver(post_save, sender=CastMember)
+def index_cast_member_movies(sender, instance, created, **kwargs):
+    if not created:
+        movie_ids = list(instance.movies.values_list('id', flat=True))
+        transaction.on_commit(partial(reindex_movies, movie_ids))
+
+
+@receiver(m2m_changed, sender=Movie.cast.through)
+def index_movie_cast(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # The cast member's movies are gone by post_clear
+        instance._search_movie_ids = list(instance.movies.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        movie_ids = [instance.pk]
+    elif action == 'post_clear':
+        movie_ids = getattr(instance, '_search_movie_ids', [])
+    else:
+        movie_ids = list(pk_set)
+    transaction.on_commit(partial(reindex_movies, movie_ids))
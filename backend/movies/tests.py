@@ -1,3 +1,141 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+from . import ratings
+from .models import REVIEW_AGGREGATE_FIELDS, Movie, Review
+
+
+class ReviewFixtures:
+
+    def setUp(self):
+        self.owner = User.objects.create_user('studio', password='x', role='movie_owner', phone='300')
+        self.users = [User.objects.create_user(f'critic{i}', password='x', role='user', phone=f'31{i}')
+                      for i in range(3)]
+        self.movie = Movie.objects.create(
+            title='Film', description='d', language='Hindi', genre='Drama', duration=120, rating=8,
+            release_date='2020-01-01', created_by=self.owner,
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def review(self, user, rating):
+        response = self.client_for(user).post(f'/api/movies/{self.movie.slug}/reviews/',
+                                              {'rating': rating, 'comment': 'ok'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Review.objects.get(pk=response.json()['id'])
+
+    def assert_aggregates(self, *ratings_):
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.review_count, len(ratings_))
+        self.assertEqual(self.movie.review_rating_sum, sum(ratings_))
+        self.assertEqual(self.movie.rating_histogram, {stars: ratings_.count(stars) for stars in range(1, 6)})
+
+
+class ReviewAggregateTests(ReviewFixtures, TestCase):
+
+    def test_api_changes_keep_aggregates_in_step(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        self.assert_aggregates(5, 3)
+        self.assertEqual(self.movie.average_rating, 4.0)
+
+        url = f'/api/movies/{self.movie.slug}/reviews'
+        response = self.client_for(self.users[0]).patch(f'{url}/update/{first.pk}/', {'rating': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_aggregates(2, 3)
+
+        self.assertEqual(self.client_for(self.users[0]).delete(f'{url}/delete/{first.pk}/').status_code, 200)
+        self.assert_aggregates(3)
+        # Deleting twice must not count twice
+        self.assertEqual(self.client_for(self.users[0]).delete(f'{url}/delete/{first.pk}/').status_code, 404)
+        self.assert_aggregates(3)
+
+        self.assertEqual(self.client_for(self.users[0]).patch(f'{url}/restore/{first.pk}/').status_code, 200)
+        self.assert_aggregates(2, 3)
+        self.assertEqual(self.client_for(self.users[0]).patch(f'{url}/restore/{first.pk}/').status_code, 400)
+        self.assert_aggregates(2, 3)
+
+    def test_saving_a_stale_movie_keeps_aggregates(self):
+        stale = Movie.objects.get(pk=self.movie.pk)
+        self.review(self.users[0], 4)
+
+        stale.title = 'Renamed'
+        stale.save()
+        self.assert_aggregates(4)
+        self.assertEqual(self.movie.title, 'Renamed')
+
+    def test_recompute_rebuilds_from_active_reviews(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 1)
+        Review.objects.create(movie=self.movie, user=self.users[2], rating=4, is_deleted=True)
+        Movie.all_objects.update(**dict.fromkeys(REVIEW_AGGREGATE_FIELDS, 0))
+
+        ratings.recompute_ratings()
+        self.assert_aggregates(5, 1)
+
+        call_command('recompute_movie_ratings', stdout=StringIO())
+        self.assert_aggregates(5, 1)
+
+
+class ReviewAdminTests(ReviewFixtures, TestCase):
+    """The admin edits reviews directly, so it reports every change to movies.ratings too."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = site._registry[Review]
+        superuser = User.objects.create_superuser('root', password='x', phone='399')
+        self.request = RequestFactory().post('/admin/')
+        self.request.user = superuser
+
+    def save(self, review, change=True):
+        self.admin.save_model(self.request, review, None, change)
+
+    def test_admin_edits_update_aggregates(self):
+        review = Review(movie=self.movie, user=self.users[0], rating=5)
+        self.save(review, change=False)
+        self.assert_aggregates(5)
+
+        review.rating = 3
+        self.save(review)
+        self.assert_aggregates(3)
+
+        review.is_deleted = True
+        self.save(review)
+        self.assert_aggregates()
+
+        self.assertTrue(self.admin.restore(review))
+        self.assertFalse(self.admin.restore(review))
+        self.assert_aggregates(3)
+
+    def test_moving_a_review_to_another_movie(self):
+        other = Movie.objects.create(
+            title='Sequel', description='d', language='Hindi', genre='Drama', duration=120, rating=8,
+            release_date='2021-01-01', created_by=self.owner,
+        )
+        review = self.review(self.users[0], 4)
+        review.movie = other
+        self.save(review)
+
+        self.assert_aggregates()
+        other.refresh_from_db()
+        self.assertEqual((other.review_count, other.review_rating_sum), (1, 4))
+
+    def test_admin_deletes_update_aggregates(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 2)
+        Review.objects.create(movie=self.movie, user=self.users[2], rating=4, is_deleted=True)
+
+        self.admin.delete_model(self.request, first)
+        self.assert_aggregates(2)
+
+        self.admin.delete_queryset(self.request, Review.all_objects.all())
+        self.assert_aggregates()
+        self.assertFalse(Review.all_objects.exists())
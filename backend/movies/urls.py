@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     CastMemberRestoreView,
     MovieListView,
+    MovieSearchView,
     MovieDetailView,
     MovieCreateView,
     MovieUpdateView,
@@ -30,6 +31,7 @@ urlpatterns = [
     # Movie routes — put these AFTER cast
     path('', MovieListView.as_view(), name='movie-list'),
     path('create/', MovieCreateView.as_view(), name='movie-create'),
+    path('search/', MovieSearchView.as_view(), name='movie-search'),
     path('<slug:slug>/', MovieDetailView.as_view(), name='movie-detail'),
     path('<slug:slug>/update/', MovieUpdateView.as_view(), name='movie-update'),
     path('<slug:slug>/delete/', MovieDeleteView.as_view(), name='movie-delete'),
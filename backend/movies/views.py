@@ -1,10 +1,20 @@
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from django.db.models import Prefetch
+from bookmyshow.routers import ReplicaReadMixin
+from . import ratings
+from .cache import CachedListMixin
 from .models import Movie, CastMember, Review
+from .pagination import CastMemberCursorPagination, MovieCursorPagination, ReviewCursorPagination
+from .search import search
 from .serializers import (
     MovieSerializer,
     MovieCreateUpdateSerializer,
+    MovieSearchQuerySerializer,
+    MovieSearchResultSerializer,
     CastMemberSerializer,
     CastMemberDetailSerializer,
     ReviewSerializer
@@ -19,15 +29,32 @@ from .permissions import (
 )
 
 # 🔹 Movies
-class MovieListView(generics.ListAPIView):
-    queryset = Movie.objects.filter(is_deleted=False)
+class MovieListView(ReplicaReadMixin, CachedListMixin, generics.ListAPIView):
+    queryset = Movie.objects.filter(is_deleted=False).select_related('created_by').prefetch_related('cast')
     serializer_class = MovieSerializer
+    pagination_class = MovieCursorPagination
+    cache_prefix = 'movie-list'
 
-class MovieDetailView(generics.RetrieveAPIView):
-    queryset = Movie.objects.filter(is_deleted=False)
+class MovieDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
+    queryset = Movie.objects.filter(is_deleted=False).select_related('created_by').prefetch_related('cast')
     serializer_class = MovieSerializer
     lookup_field = 'slug'
 
+# 🔹 Typeahead search over titles, cast, genre, language and description
+class MovieSearchView(APIView):
+    def get(self, request):
+        params = MovieSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ranked = search(params.validated_data['q'], params.validated_data['limit'])
+        movies = Movie.objects.in_bulk([movie_id for movie_id, _ in ranked])
+
+        results = []
+        for movie_id, score in ranked:
+            if movie_id in movies:
+                data = MovieSearchResultSerializer(movies[movie_id], context={'request': request}).data
+                results.append({**data, 'score': score})
+        return Response({'query': params.validated_data['q'], 'results': results})
+
 class MovieCreateView(generics.CreateAPIView):
     queryset = Movie.objects.all()
     serializer_class = MovieCreateUpdateSerializer
@@ -70,17 +97,21 @@ class MovieRestoreView(generics.UpdateAPIView):
         return Response({"message": "Movie restored successfully."}, status=status.HTTP_200_OK)
 
 # 🔹 Cast
-class CastMemberListView(generics.ListAPIView):
+class CastMemberListView(CachedListMixin, generics.ListAPIView):
     queryset = CastMember.objects.filter(is_deleted=False)
     serializer_class = CastMemberSerializer
+    pagination_class = CastMemberCursorPagination
+    cache_prefix = 'cast-list'
 
 class CastMemberCreateView(generics.CreateAPIView):
     queryset = CastMember.objects.all()
     serializer_class = CastMemberSerializer
     permission_classes = [IsAdminOrStaff]
 
-class CastMemberDetailView(generics.RetrieveAPIView):
-    queryset = CastMember.objects.filter(is_deleted=False)
+class CastMemberDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
+    queryset = CastMember.objects.filter(is_deleted=False).prefetch_related(
+        Prefetch('movies', queryset=Movie.objects.select_related('created_by').prefetch_related('cast'))
+    )
     serializer_class = CastMemberDetailSerializer
     lookup_field = 'id'
 
@@ -121,9 +152,12 @@ class CastMemberRestoreView(generics.UpdateAPIView):
 class ReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = []  # Auth check is handled in perform_create
+    pagination_class = ReviewCursorPagination
 
     def get_queryset(self):
-        return Review.objects.filter(movie__slug=self.kwargs['slug'], is_deleted=False)
+        return Review.objects.filter(
+            movie__slug=self.kwargs['slug'], is_deleted=False
+        ).select_related('user', 'movie')
 
     def post(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -137,7 +171,9 @@ class ReviewListCreateView(generics.ListCreateAPIView):
     # Check if user already reviewed this movie
         if Review.objects.filter(user=user, movie=movie, is_deleted=False).exists():
             raise ValidationError("You have already submitted a review for this movie.")
-        serializer.save(user=self.request.user, movie=movie)
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user, movie=movie)
+            ratings.review_added(review)
 
 class ReviewUpdateView(generics.UpdateAPIView):
     queryset = Review.objects.filter(is_deleted=False)
@@ -147,6 +183,12 @@ class ReviewUpdateView(generics.UpdateAPIView):
 
     def get_queryset(self):
          return self.queryset.filter(movie__slug=self.kwargs['slug'])
+
+    def perform_update(self, serializer):
+        old_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            ratings.review_rating_changed(review, old_rating)
      
 class ReviewDeleteView(generics.DestroyAPIView):
     queryset = Review.all_objects.all()
@@ -158,8 +200,12 @@ class ReviewDeleteView(generics.DestroyAPIView):
         return self.queryset.filter(movie__slug=self.kwargs['slug'])
 
     def perform_destroy(self, instance):
-        instance.is_deleted = True
-        instance.save()
+        # Only the request that flips the flag updates the movie's ratings
+        with transaction.atomic():
+            if Review.all_objects.filter(pk=instance.pk, is_deleted=False).update(is_deleted=True):
+                ratings.review_removed(instance)
+                return True
+        return False
 
     def delete(self, request, *args, **kwargs):
         try:
@@ -167,7 +213,8 @@ class ReviewDeleteView(generics.DestroyAPIView):
         except Review.DoesNotExist:
             return Response({"detail": "Review not found or already deleted."}, status=status.HTTP_404_NOT_FOUND)
 
-        self.perform_destroy(instance)
+        if not self.perform_destroy(instance):
+            return Response({"detail": "Review not found or already deleted."}, status=status.HTTP_404_NOT_FOUND)
         return Response({"message": "Review deleted successfully."}, status=status.HTTP_200_OK)
     
 class ReviewRestoreView(generics.UpdateAPIView):
@@ -179,14 +226,17 @@ class ReviewRestoreView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        if not instance.is_deleted:
+        with transaction.atomic():
+            restored = Review.all_objects.filter(pk=instance.pk, is_deleted=True).update(is_deleted=False)
+            if restored:
+                ratings.review_added(instance)
+
+        if not restored:
             return Response(
                 {"detail": "Review is already active."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        instance.is_deleted = False
-        instance.save()
         return Response(
             {"message": "Review restored successfully."},
             status=status.HTTP_200_OK
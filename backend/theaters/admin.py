@@ -1,5 +1,5 @@
 from django.contrib import admin, messages
-from .models import Show, Theater, Screen
+from .models import Show, Theater, Screen, ScreenLayout
 
 # 🔹 Generic SoftDeleteAdmin base class
 class SoftDeleteAdmin(admin.ModelAdmin):
@@ -17,7 +17,12 @@ class SoftDeleteAdmin(admin.ModelAdmin):
 
     @admin.action(description="Restore selected soft-deleted items")
     def restore_objects(self, request, queryset):
-        restored = queryset.update(is_deleted=False)
+        # Saved one by one so signals (e.g. the showtime table) see the restore
+        restored = 0
+        for obj in queryset.filter(is_deleted=True):
+            obj.is_deleted = False
+            obj.save(update_fields=['is_deleted'])
+            restored += 1
         self.message_user(request, f"{restored} item(s) successfully restored.", messages.SUCCESS)
         if not restored:
             self.message_user(request, "No items were restored.", messages.WARNING)
@@ -45,4 +50,10 @@ class ScreenAdmin(SoftDeleteAdmin):
     search_fields = ('name', 'theater__name')
     list_filter = ('theater', 'is_deleted')
     prepopulated_fields = {"slug": ("name",)}
-    
\ No newline at end of file
+
+
+# 🔹 Screen Layout Admin (saving syncs the screen's seats)
+@admin.register(ScreenLayout)
+class ScreenLayoutAdmin(admin.ModelAdmin):
+    list_display = ('screen', 'rows', 'columns', 'updated_at')
+    search_fields = ('screen__name', 'screen__theater__name')
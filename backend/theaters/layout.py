@@ -0,0 +1,112 @@
+"""
+Compact seat-grid codec for ``ScreenLayout``.
+
+A layout is a ``rows × columns`` grid. Seat types are stored as a run-length
+string over the grid in row-major order, one letter per type and ``_`` for
+positions without a seat, e.g. ``10v5_15r5p10_``. Seats are numbered per row
+(``A1``, ``A2`` ...) counting only real seats, so gaps never shift numbers.
+Aisles are a list of column indexes that are followed by a walkway.
+"""
+import re
+from collections import namedtuple
+from itertools import groupby
+
+SEAT_TYPE_CODES = {'regular': 'r', 'vip': 'v', 'premium': 'p'}
+CODE_SEAT_TYPES = {code: seat_type for seat_type, code in SEAT_TYPE_CODES.items()}
+NO_SEAT = '_'
+
+_RUN = re.compile(r'(\d+)([a-z_])')
+_SEAT_NUMBER = re.compile(r'^([A-Z]+)(\d+)$')
+
+SeatPosition = namedtuple('SeatPosition', 'seat_number seat_type row column')
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def row_label(index):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'."""
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+def row_index(label):
+    index = 0
+    for char in label:
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def encode_runs(cells):
+    """Run-length encode a row-major string of type codes."""
+    return ''.join(f"{len(list(run))}{code}" for code, run in groupby(cells))
+
+
+def decode_runs(runs, size):
+    """Expand a run-length string back into ``size`` type codes."""
+    cells = []
+    consumed = 0
+    for match in _RUN.finditer(runs):
+        if match.start() != consumed:
+            break
+        code = match.group(2)
+        if code != NO_SEAT and code not in CODE_SEAT_TYPES:
+            raise LayoutError(f"Unknown seat type code '{code}'.")
+        cells.append(code * int(match.group(1)))
+        consumed = match.end()
+    if consumed != len(runs):
+        raise LayoutError("Malformed seat type runs.")
+
+    cells = ''.join(cells)
+    if len(cells) != size:
+        raise LayoutError(f"Seat type runs cover {len(cells)} positions, expected {size}.")
+    return cells
+
+
+def seat_positions(rows, columns, runs):
+    """Decode a layout into ``SeatPosition`` tuples in row-major order."""
+    cells = decode_runs(runs, rows * columns)
+    positions = []
+    for row in range(rows):
+        label = row_label(row)
+        number = 0
+        offset = row * columns
+        for column in range(columns):
+            code = cells[offset + column]
+            if code != NO_SEAT:
+                number += 1
+                positions.append(SeatPosition(f"{label}{number}", CODE_SEAT_TYPES[code], row, column))
+    return positions
+
+
+def layout_from_seats(seats):
+    """
+    Build ``(rows, columns, runs)`` from ``(seat_number, seat_type)`` pairs
+    numbered like ``A1``. Each row is placed left-aligned, so its numbers must
+    run 1..n; anything else raises ``LayoutError``.
+    """
+    rows = {}
+    for seat_number, seat_type in seats:
+        match = _SEAT_NUMBER.match(seat_number)
+        if not match:
+            raise LayoutError(f"Seat '{seat_number}' cannot be placed on a grid.")
+        if seat_type not in SEAT_TYPE_CODES:
+            raise LayoutError(f"Unknown seat type '{seat_type}'.")
+        rows.setdefault(row_index(match.group(1)), {})[int(match.group(2))] = SEAT_TYPE_CODES[seat_type]
+    if not rows:
+        raise LayoutError("A layout needs at least one seat.")
+
+    columns = max(len(numbers) for numbers in rows.values())
+    cells = []
+    for row in range(max(rows) + 1):
+        numbers = rows.get(row, {})
+        if sorted(numbers) != list(range(1, len(numbers) + 1)):
+            raise LayoutError(f"Seats in row {row_label(row)} are not numbered 1..{len(numbers)}.")
+        cells.append(''.join(numbers[n] for n in range(1, len(numbers) + 1)))
+        cells.append(NO_SEAT * (columns - len(numbers)))
+    return max(rows) + 1, columns, encode_runs(''.join(cells))
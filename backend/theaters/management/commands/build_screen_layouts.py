@@ -0,0 +1,32 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from bookings.models import Seat
+from theaters.layout import LayoutError, layout_from_seats
+from theaters.models import Screen, ScreenLayout
+
+
+class Command(BaseCommand):
+    help = "Build a ScreenLayout from the existing seats of every screen that has none"
+
+    def handle(self, *args, **kwargs):
+        # Layouts are built from the seats, so fold older duplicate seats first
+        call_command('merge_duplicate_seats', stdout=self.stdout)
+
+        screen_ids = Screen.all_objects.filter(layout__isnull=True).values_list('id', flat=True)
+
+        layouts = []
+        for screen_id in screen_ids.iterator():
+            seats = dict(Seat.objects.filter(screen_id=screen_id).values_list('seat_number', 'seat_type'))
+            if not seats:
+                continue
+            try:
+                rows, columns, seat_types = layout_from_seats(seats.items())
+            except LayoutError as e:
+                self.stdout.write(self.style.WARNING(f"⚠️ Skipped screen {screen_id}: {e}"))
+                continue
+            layouts.append(ScreenLayout(screen_id=screen_id, rows=rows, columns=columns, seat_types=seat_types))
+
+        # Seats already exist, so the layouts are inserted without syncing them
+        ScreenLayout.objects.bulk_create(layouts, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"🎉 Built {len(layouts)} screen layout(s)"))
@@ -0,0 +1,78 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from bookings import availability
+from bookings.models import Booking, BookedSeat, Seat, Ticket
+
+
+class Command(BaseCommand):
+    help = ("Merge the duplicate seats older data has (several Seat rows with the same number on a screen) "
+            "into the lowest id, moving their bookings and tickets over")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be merged")
+
+    def handle(self, *args, **kwargs):
+        screen_ids = (Seat.objects.values('screen_id', 'seat_number').annotate(n=Count('id')).filter(n__gt=1)
+                      .values_list('screen_id', flat=True).distinct().order_by('screen_id'))
+
+        merged = kept = 0
+        for screen_id in list(screen_ids):
+            groups = {}
+            for seat_id, seat_number in Seat.objects.filter(screen_id=screen_id).order_by('id').values_list(
+                    'id', 'seat_number'):
+                groups.setdefault(seat_number, []).append(seat_id)
+            groups = {seat_number: ids for seat_number, ids in groups.items() if len(ids) > 1}
+
+            if kwargs['dry_run']:
+                count = sum(len(ids) - 1 for ids in groups.values())
+                self.stdout.write(f"· Screen {screen_id}: {count} duplicate seat(s)")
+                merged += count
+                continue
+
+            with transaction.atomic():
+                for seat_number, ids in groups.items():
+                    done, conflicts = self._merge(ids)
+                    merged += done
+                    kept += len(conflicts)
+                    for seat_id in conflicts:
+                        self.stdout.write(self.style.WARNING(
+                            f"⚠️ Kept seat {seat_id} ({seat_number}, screen {screen_id}): "
+                            f"its show is also booked on seat {ids[0]}"
+                        ))
+                transaction.on_commit(partial(availability.invalidate_screen, screen_id))
+
+        verb = "Would merge" if kwargs['dry_run'] else "Merged"
+        self.stdout.write(self.style.SUCCESS(f"🎉 {verb} {merged} duplicate seat(s)"))
+        if kept:
+            self.stdout.write(self.style.WARNING(f"⚠️ {kept} duplicate seat(s) are double-booked and were kept"))
+
+    @staticmethod
+    def _merge(ids):
+        """Move everything on the duplicates onto ``ids[0]`` and delete them. Returns (merged, kept ids)."""
+        seat_id, duplicate_ids = ids[0], ids[1:]
+        through = Booking.seats.through
+        booked_shows = set(BookedSeat.objects.filter(seat_id=seat_id).values_list('show_id', flat=True))
+        merged, conflicts = 0, []
+
+        for duplicate_id in duplicate_ids:
+            shows = set(BookedSeat.objects.filter(seat_id=duplicate_id).values_list('show_id', flat=True))
+            if shows & booked_shows:
+                # The same seat was sold twice for a show; leave it for a person to sort out
+                conflicts.append(duplicate_id)
+                continue
+            booked_shows |= shows
+
+            BookedSeat.objects.filter(seat_id=duplicate_id).update(seat_id=seat_id)
+            Ticket.objects.filter(seat_id=duplicate_id).update(seat_id=seat_id)
+            # A booking listing both rows keeps one
+            both = through.objects.filter(seat_id=seat_id).values_list('booking_id', flat=True)
+            through.objects.filter(seat_id=duplicate_id, booking_id__in=list(both)).delete()
+            through.objects.filter(seat_id=duplicate_id).update(seat_id=seat_id)
+
+            Seat.objects.filter(id=duplicate_id).delete()
+            merged += 1
+        return merged, conflicts
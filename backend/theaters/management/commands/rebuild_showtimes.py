@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from theaters.showtimes import rebuild_showtimes
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized showtime table from active shows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Shows synced per batch")
+
+    def handle(self, *args, **kwargs):
+        total = rebuild_showtimes(batch_size=kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✔ Rebuilt {total} showtimes"))
@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from django.utils.crypto import get_random_string
+from .layout import LayoutError, decode_runs, seat_positions
 
 def unique_slugify(instance, value, slug_field_name='slug', queryset=None):
     slug = slugify(value)
@@ -59,6 +61,63 @@ class Screen(models.Model):
     def __str__(self):
         return f"{self.name} at {self.theater.name}"
 
+
+class ScreenLayout(models.Model):
+    """
+    Seat grid of a screen in one row: dimensions, aisle gaps and a run-length
+    map of seat types (see ``theaters.layout``). ``Seat`` rows are kept in
+    sync from it so bookings and tickets can still reference seats by id.
+    """
+    screen = models.OneToOneField(Screen, related_name='layout', on_delete=models.CASCADE)
+    rows = models.PositiveSmallIntegerField()
+    columns = models.PositiveSmallIntegerField()
+    aisles = models.JSONField(default=list, blank=True, help_text="Columns followed by an aisle gap")
+    seat_types = models.TextField(help_text="Run-length seat types by row, e.g. '10v5_15r'")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def clean(self):
+        try:
+            decode_runs(self.seat_types, self.rows * self.columns)
+        except LayoutError as e:
+            raise ValidationError({'seat_types': str(e)})
+        if not isinstance(self.aisles, list) or any(
+            not isinstance(column, int) or not 0 <= column < self.columns - 1 for column in self.aisles
+        ):
+            raise ValidationError({'aisles': "Aisles must be column indexes inside the grid."})
+
+    def seat_positions(self):
+        return seat_positions(self.rows, self.columns, self.seat_types)
+
+    def sync_seats(self):
+        """
+        Create seats the layout has but the screen lacks and fix changed seat
+        types. Seats dropped from the layout are kept for existing bookings but
+        no longer offered. Returns the number of seats created.
+        """
+        from bookings.models import Seat
+        existing = {}
+        # Lowest id wins where older data has duplicate seat numbers
+        for seat_id, seat_number, seat_type in Seat.objects.filter(
+            screen_id=self.screen_id
+        ).order_by('-id').values_list('id', 'seat_number', 'seat_type'):
+            existing[seat_number] = (seat_id, seat_type)
+
+        missing, changed = [], []
+        for position in self.seat_positions():
+            current = existing.get(position.seat_number)
+            if current is None:
+                missing.append(Seat(screen_id=self.screen_id, seat_number=position.seat_number,
+                                    seat_type=position.seat_type))
+            elif current[1] != position.seat_type:
+                changed.append(Seat(id=current[0], seat_type=position.seat_type))
+
+        Seat.objects.bulk_create(missing)
+        Seat.objects.bulk_update(changed, ['seat_type'])
+        return len(missing)
+
+    def __str__(self):
+        return f"{self.screen.name} layout ({self.rows}x{self.columns})"
+
 class Show(models.Model):
     screen = models.ForeignKey(Screen, related_name='shows', on_delete=models.CASCADE)
     movie = models.ForeignKey('movies.Movie', related_name='shows', on_delete=models.CASCADE)
@@ -69,5 +128,32 @@ class Show(models.Model):
     objects = SoftDeleteManager()
     all_objects = models.Manager()
 
+    class Meta:
+        indexes = [models.Index(fields=['show_time', 'movie', 'is_deleted'], name='theaters_show_time_movie')]
+
     def __str__(self):
         return f"{self.movie.title} at {self.screen.theater.name} on {self.show_time.strftime('%Y-%m-%d %H:%M')}"
+
+
+class Showtime(models.Model):
+    """
+    One row per bookable show (show, screen, theater and movie all active)
+    with its city and local date copied in, so "movie X in city Y on day Z"
+    is a single index lookup. Maintained by ``theaters.showtimes``.
+    """
+    show = models.OneToOneField(Show, primary_key=True, related_name='showtime', on_delete=models.CASCADE)
+    movie = models.ForeignKey('movies.Movie', related_name='+', on_delete=models.CASCADE)
+    theater = models.ForeignKey(Theater, related_name='+', on_delete=models.CASCADE)
+    screen = models.ForeignKey(Screen, related_name='+', on_delete=models.CASCADE)
+    city = models.CharField(max_length=255)
+    show_date = models.DateField()
+    show_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['city', 'show_date', 'movie'], name='theaters_showtime_city'),
+            models.Index(fields=['movie', 'show_date'], name='theaters_showtime_movie'),
+        ]
+
+    def __str__(self):
+        return f"Show #{self.show_id} in {self.city} on {self.show_date}"
@@ -45,3 +45,17 @@ class ShowSerializer(serializers.ModelSerializer):
 
     def get_created_by(self, obj):
         return obj.created_by.username
+
+
+# 🎬 Showtimes query
+class ShowtimeQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, max_length=255)
+    movie = serializers.IntegerField(required=False, min_value=1)
+    date = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=7, default=1)
+    min_available = serializers.IntegerField(min_value=0, default=0)
+
+    def validate(self, data):
+        if not data.get('city') and not data.get('movie'):
+            raise serializers.ValidationError("Filter by city, movie or both.")
+        return data
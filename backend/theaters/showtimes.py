@@ -0,0 +1,98 @@
+"""
+Showtimes across theaters, served from the denormalized ``Showtime`` table.
+
+``sync_showtimes`` rewrites the rows of the shows matching a filter and is
+called from signals whenever a show, screen, theater or movie changes.
+``find_showtimes`` answers "which shows of movie X play in city Y on these
+days", grouped by theater, with seat availability from the cached screen
+seating and one query for the booked seats instead of one seat map per show.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.timezone import localtime, now
+
+from bookings import availability
+from bookings.models import BookedSeat
+from .models import Show, Showtime
+
+
+def city_of(location):
+    """``'Mumbai, Mall'`` → ``'mumbai'``: the first part of a theater location."""
+    return location.split(',')[0].strip().lower()
+
+
+def _is_active(show):
+    return not (show.is_deleted or show.screen.is_deleted or show.screen.theater.is_deleted or show.movie.is_deleted)
+
+
+def sync_showtimes(**show_filter):
+    """Rebuild the showtime rows of shows matching ``show_filter``."""
+    shows = list(Show.all_objects.filter(**show_filter).select_related('screen__theater', 'movie'))
+    rows = [
+        Showtime(
+            show_id=show.id,
+            movie_id=show.movie_id,
+            theater_id=show.screen.theater_id,
+            screen_id=show.screen_id,
+            city=city_of(show.screen.theater.location),
+            show_date=localtime(show.show_time).date(),
+            show_time=show.show_time,
+        )
+        for show in shows
+        if _is_active(show)
+    ]
+    with transaction.atomic():
+        Showtime.objects.filter(show_id__in=[show.id for show in shows]).delete()
+        Showtime.objects.bulk_create(rows)
+    return len(rows)
+
+
+def rebuild_showtimes(batch_size=5000):
+    """Rebuild the whole table. Returns the number of showtimes."""
+    total = 0
+    with transaction.atomic():
+        Showtime.objects.all().delete()
+        show_ids = list(Show.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(show_ids), batch_size):
+            total += sync_showtimes(id__in=show_ids[start:start + batch_size])
+    return total
+
+
+def find_showtimes(city=None, movie_id=None, start_date=None, days=1, min_available=0):
+    """
+    Return ``[(theater, [(showtime, available, total), ...]), ...]`` for the
+    upcoming shows in the date window, theaters by name and shows by time.
+    """
+    start_date = start_date or localtime().date()
+    showtimes = Showtime.objects.filter(
+        show_date__gte=start_date,
+        show_date__lt=start_date + timedelta(days=days),
+        show_time__gte=now(),
+    ).select_related('theater', 'screen', 'movie').order_by('show_time')
+    if city:
+        showtimes = showtimes.filter(city=city_of(city))
+    if movie_id:
+        showtimes = showtimes.filter(movie_id=movie_id)
+    showtimes = list(showtimes)
+    if not showtimes:
+        return []
+
+    # Offered seats per screen, as the seat map and the booking engines count them
+    seatings = {screen_id: availability.get_seating(screen_id) for screen_id in {s.screen_id for s in showtimes}}
+    screen_of = {showtime.show_id: showtime.screen_id for showtime in showtimes}
+    taken = {}
+    for show_id, seat_id in BookedSeat.objects.filter(show_id__in=list(screen_of)).values_list('show_id', 'seat_id'):
+        # Duplicates share their seat's position; dropped seats have none
+        position = seatings[screen_of[show_id]].positions.get(seat_id)
+        if position is not None:
+            taken.setdefault(show_id, set()).add(position)
+
+    theaters = {}
+    for showtime in showtimes:
+        total = len(seatings[showtime.screen_id].seats)
+        available = total - len(taken.get(showtime.show_id, ()))
+        if available < min_available:
+            continue
+        theaters.setdefault(showtime.theater_id, (showtime.theater, []))[1].append((showtime, available, total))
+    return sorted(theaters.values(), key=lambda item: (item[0].name, item[0].id))
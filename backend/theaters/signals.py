@@ -1,32 +1,71 @@
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from bookings.models import ShowSeatPricing, Seat, SEAT_TYPE_CHOICES
-from .models import Show
+from bookings import availability
+from bookings.models import ShowSeatPricing, Seat
+from movies.models import Movie
+from .layout import layout_from_seats
+from .models import Screen, ScreenLayout, Show, Theater
+from .showtimes import sync_showtimes
+
+# seat_type: (row_prefix, seat count, default price)
+DEFAULT_SEAT_MAP = {
+    'vip': ('A', 10, 350),
+    'regular': ('B', 15, 200),
+    'premium': ('C', 5, 500),
+}
+
+DEFAULT_ROWS, DEFAULT_COLUMNS, DEFAULT_SEAT_TYPES = layout_from_seats(
+    (f"{row_prefix}{i}", seat_type)
+    for seat_type, (row_prefix, count, _) in DEFAULT_SEAT_MAP.items()
+    for i in range(1, count + 1)
+)
 
 @receiver(post_save, sender=Show)
 def setup_show_seating_and_pricing(sender, instance, created, **kwargs):
     if not created:
         return
 
-    seat_map = {
-        'vip': ('A', 10, 350),
-        'regular': ('B', 15, 200),
-        'premium': ('C', 5, 500),
-    }
-
-    for seat_type, (row_prefix, count, price) in seat_map.items():
-        # Create pricing
-        ShowSeatPricing.objects.create(
-            show=instance,
-            seat_type=seat_type,
-            price=price
-        )
-
-        # Create seats under the screen
-        for i in range(1, count + 1):
-            seat_number = f"{row_prefix}{i}"
-            Seat.objects.create(
-                screen=instance.screen,  # ✅ correct field
-                seat_number=seat_number,
-                seat_type=seat_type
-            )
+    with transaction.atomic():
+        # Seats belong to the screen, so a default layout is only laid out for
+        # its first show. Locking the screen keeps concurrent shows from racing.
+        Screen.all_objects.select_for_update().only('id').get(pk=instance.screen_id)
+        if not Seat.objects.filter(screen_id=instance.screen_id).exists():
+            ScreenLayout.objects.update_or_create(screen_id=instance.screen_id, defaults={
+                'rows': DEFAULT_ROWS,
+                'columns': DEFAULT_COLUMNS,
+                'seat_types': DEFAULT_SEAT_TYPES,
+            })
+
+        ShowSeatPricing.objects.bulk_create([
+            ShowSeatPricing(show=instance, seat_type=seat_type, price=price)
+            for seat_type, (_, _, price) in DEFAULT_SEAT_MAP.items()
+        ])
+
+@receiver(post_save, sender=ScreenLayout)
+def sync_layout_seats(sender, instance, **kwargs):
+    instance.sync_seats()
+    # bulk_create skips post_save, so refresh cached availability here
+    transaction.on_commit(partial(availability.invalidate_screen, instance.screen_id))
+
+# 🔹 Keep the showtime table in step with everything it copies (soft deletes are saves)
+@receiver(post_save, sender=Show)
+def sync_show_showtime(sender, instance, **kwargs):
+    sync_showtimes(pk=instance.pk)
+
+@receiver(post_save, sender=Screen)
+def sync_screen_showtimes(sender, instance, created, **kwargs):
+    if not created:
+        sync_showtimes(screen_id=instance.pk)
+
+@receiver(post_save, sender=Theater)
+def sync_theater_showtimes(sender, instance, created, **kwargs):
+    if not created:
+        sync_showtimes(screen__theater_id=instance.pk)
+
+@receiver(post_save, sender=Movie)
+def sync_movie_showtimes(sender, instance, created, **kwargs):
+    if not created:
+        sync_showtimes(movie_id=instance.pk)
@@ -1,3 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils.timezone import localtime, now
+
+from bookings import availability
+from bookings.engine import create_booking
+from bookings.models import BookedSeat, Booking, Seat, Ticket
+from movies.models import Movie
+from users.models import User
+from .models import Screen, Show, Theater
+from .showtimes import find_showtimes
+
+
+class TheaterFixtures:
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='x', role='user', phone='200')
+        self.owner = User.objects.create_user('owner', password='x', role='theater_owner', phone='201')
+        self.movie = Movie.objects.create(
+            title='Film', description='d', language='Hindi', genre='Drama', duration=120, rating=8,
+            release_date='2020-01-01', created_by=self.owner,
+        )
+        self.theater = Theater.objects.create(name='Cinema', location='Mumbai, Mall', created_by=self.owner)
+        self.screen = Screen.objects.create(name='Screen 1', theater=self.theater, created_by=self.owner)
+        self.show = Show.objects.create(screen=self.screen, movie=self.movie,
+                                        show_time=now() + timedelta(hours=2), created_by=self.owner)
+        availability.invalidate_all()
+
+    def tearDown(self):
+        availability.invalidate_all()
+
+    def seat(self, seat_number):
+        return Seat.objects.filter(screen=self.screen, seat_number=seat_number).order_by('id').first()
+
+    def book_on(self, seat, show=None):
+        booking = Booking.objects.create(user=self.user, show=show or self.show, total_price=0)
+        BookedSeat.objects.create(show=booking.show, seat=seat, booking=booking)
+        booking.seats.add(seat)
+        return booking
+
+
+class MergeDuplicateSeatsTests(TheaterFixtures, TestCase):
+
+    def merge(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('merge_duplicate_seats', *args, stdout=out)
+        return out.getvalue()
+
+    def test_duplicates_are_folded_into_the_lowest_id(self):
+        canonical = self.seat('A1')
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='A1', seat_type='vip')
+        booking = self.book_on(duplicate)
+        ticket = Ticket.objects.create(booking=booking, seat=duplicate, show=self.show)
+
+        self.assertIn('Would merge 1', self.merge('--dry-run'))
+        self.assertTrue(Seat.objects.filter(pk=duplicate.pk).exists())
+
+        self.assertIn('Merged 1', self.merge())
+        self.assertFalse(Seat.objects.filter(pk=duplicate.pk).exists())
+        self.assertEqual(BookedSeat.objects.get(booking=booking).seat_id, canonical.id)
+        self.assertEqual(list(booking.seats.values_list('id', flat=True)), [canonical.id])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.seat_id, canonical.id)
+        # The merged booking shows on the seat it now points at
+        available = availability.get_availability(self.show.id).available_seats()
+        self.assertNotIn(canonical.id, [seat['id'] for seat in available])
+
+    def test_double_booked_duplicates_are_kept(self):
+        canonical = self.seat('A2')
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='A2', seat_type='vip')
+        self.book_on(canonical)
+        self.book_on(duplicate)
+
+        output = self.merge()
+        self.assertIn('Merged 0', output)
+        self.assertIn(f'Kept seat {duplicate.id}', output)
+        self.assertEqual(BookedSeat.objects.filter(seat=duplicate).count(), 1)
+
+    def test_booked_on_different_shows_merges(self):
+        later = Show.objects.create(screen=self.screen, movie=self.movie,
+                                    show_time=now() + timedelta(hours=5), created_by=self.owner)
+        canonical = self.seat('A3')
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='A3', seat_type='vip')
+        self.book_on(canonical)
+        self.book_on(duplicate, show=later)
+
+        self.assertIn('Merged 1', self.merge())
+        self.assertEqual(BookedSeat.objects.filter(seat=canonical).count(), 2)
+
+
+class ShowtimeTests(TheaterFixtures, TestCase):
+
+    def showtimes(self):
+        results = find_showtimes(city='Mumbai', movie_id=self.movie.id,
+                                 start_date=localtime(self.show.show_time).date())
+        return {showtime.show_id: (available, total) for _, shows in results for showtime, available, total in shows}
+
+    def test_counts_offered_seats(self):
+        self.assertEqual(self.showtimes(), {self.show.id: (30, 30)})
+
+        create_booking(self.user, self.show, [self.seat('A1'), self.seat('A2')], engine='locking')
+        self.assertEqual(self.showtimes(), {self.show.id: (28, 30)})
+
+    def test_duplicate_seats_count_once(self):
+        duplicate = Seat.objects.create(screen=self.screen, seat_number='B1', seat_type='regular')
+        self.book_on(duplicate)
+        self.book_on(self.seat('B2'))
+        self.assertEqual(self.showtimes(), {self.show.id: (28, 30)})
 
-# Create your tests here.
+    def test_deleted_shows_are_dropped(self):
+        self.show.is_deleted = True
+        self.show.save()
+        self.assertEqual(self.showtimes(), {})
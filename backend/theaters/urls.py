@@ -12,12 +12,16 @@ from .views import (
     # Show views
     ShowListByTheaterView, ShowCreateUnderTheaterView, ShowDetailView,
     ShowUpdateView, ShowDeleteView, ShowRestoreView,
+
+    # Showtimes
+    ShowtimeSearchView,
 )
 
 urlpatterns = [
     # 🎭 Theaters
     path('', TheaterListView.as_view(), name='theater-list'),
     path('create/', TheaterCreateView.as_view(), name='theater-create'),
+    path('showtimes/', ShowtimeSearchView.as_view(), name='showtime-search'),
     path('<slug:slug>/', TheaterDetailView.as_view(), name='theater-detail'),
     path('<slug:slug>/update/', TheaterUpdateView.as_view(), name='theater-update'),
     path('<slug:slug>/delete/', TheaterDeleteView.as_view(), name='theater-delete'),
@@ -1,8 +1,12 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.views import APIView
+from django.utils.timezone import localtime
+from bookmyshow.routers import ReplicaReadMixin
 from .models import Theater, Screen, Show
-from .serializers import TheaterSerializer, ScreenSerializer, ShowSerializer
+from .serializers import TheaterSerializer, ScreenSerializer, ShowSerializer, ShowtimeQuerySerializer
+from .showtimes import find_showtimes
 from .permissions import (
     IsTheaterOwner,
     IsTheaterOwnerAndCreator,
@@ -15,7 +19,7 @@ from .permissions import (
 # 🎭 Theater Views
 # ================================
 
-class TheaterListView(generics.ListAPIView):
+class TheaterListView(ReplicaReadMixin, generics.ListAPIView):
     queryset = Theater.objects.all()
     serializer_class = TheaterSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -133,7 +137,7 @@ class ScreenRestoreView(generics.UpdateAPIView):
 # 🎬 Show Views (Nested under Theater)
 # ================================
 
-class ShowListByTheaterView(generics.ListAPIView):
+class ShowListByTheaterView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ShowSerializer
     permission_classes = [IsTheaterOwnerOrReadOnly]
 
@@ -190,3 +194,50 @@ class ShowRestoreView(generics.UpdateAPIView):
         show.is_deleted = False
         show.save()
         return Response({"message": "Show restored successfully."}, status=status.HTTP_200_OK)
+
+
+# ================================
+# 🕒 Showtimes across theaters
+# ================================
+
+class ShowtimeSearchView(APIView):
+    """Upcoming shows by city and/or movie over a few days, grouped by theater."""
+
+    def get(self, request):
+        params = ShowtimeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        start_date = query.get('date') or localtime().date()
+
+        theaters = find_showtimes(
+            city=query.get('city'),
+            movie_id=query.get('movie'),
+            start_date=start_date,
+            days=query['days'],
+            min_available=query['min_available'],
+        )
+        return Response({
+            'date': start_date,
+            'days': query['days'],
+            'theaters': [
+                {
+                    'id': theater.id,
+                    'name': theater.name,
+                    'slug': theater.slug,
+                    'location': theater.location,
+                    'shows': [
+                        {
+                            'id': showtime.show_id,
+                            'show_time': localtime(showtime.show_time),
+                            'screen': {'id': showtime.screen_id, 'name': showtime.screen.name},
+                            'movie': {'id': showtime.movie_id, 'title': showtime.movie.title,
+                                      'slug': showtime.movie.slug},
+                            'available_seats': available,
+                            'total_seats': total,
+                        }
+                        for showtime, available, total in shows
+                    ],
+                }
+                for theater, shows in theaters
+            ],
+        })
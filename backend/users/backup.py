@@ -0,0 +1,345 @@
+"""
+Streaming database backups and bulk restores.
+
+A backup is a directory with one compressed NDJSON file per model (the
+``jsonl`` serialization format, one object per line) and a
+``manifest.json`` listing every file with its row count and SHA-256.
+Many-to-many relations are not embedded in their models: their through
+tables are dumped as models of their own, so restoring them is a plain
+bulk insert too.
+
+Restores insert models parents first with ``bulk_create``, so no
+``save()`` or signal runs, and record their progress in a checkpoint file
+so an interrupted restore picks up where it stopped.
+
+This module must not import models at import time: dump workers are
+spawned processes that load it before Django is set up.
+"""
+import contextlib
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd backups
+    zstandard = None
+
+MANIFEST = 'manifest.json'
+FORMAT = 'bookmyshow-backup'
+VERSION = 1
+
+EXTENSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+
+class BackupError(Exception):
+    pass
+
+
+def check_compression(compression):
+    if compression not in EXTENSIONS:
+        raise BackupError(f"Unknown compression: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise BackupError("zstd compression needs the 'zstandard' package (pip install zstandard).")
+
+
+def open_compressed(path, mode, compression):
+    """Open a compressed text file for streaming reads or writes."""
+    check_compression(compression)
+    if compression == 'gzip':
+        if 'w' in mode:
+            # No timestamp in the header: the same data gives the same checksum
+            return io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0), encoding='utf-8')
+        return gzip.open(path, mode, encoding='utf-8')
+    return zstandard.open(path, mode, encoding='utf-8')
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def backup_models():
+    """Every table with data of its own, many-to-many through tables included."""
+    return [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+
+
+def export_snapshot(using):
+    """
+    Export the snapshot of the current (repeatable read) transaction so the
+    dump workers all see the same data. PostgreSQL only; ``None`` elsewhere.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SELECT pg_export_snapshot()')
+        return cursor.fetchone()[0]
+
+
+@contextlib.contextmanager
+def _snapshot(using, snapshot):
+    if snapshot is None:
+        # Not wrapped in a transaction: SQLite would take the write lock
+        yield
+        return
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+        yield
+
+
+class BackupJSONEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which ``DjangoJSONEncoder`` cuts to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            r = o.isoformat()
+            return r[:-6] + 'Z' if r.endswith('+00:00') else r
+        if isinstance(o, datetime.time):
+            return o.isoformat()
+        return super().default(o)
+
+
+class _Counted:
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
+
+
+def dump_model(label, directory, compression='gzip', chunk_size=2000, using='default', snapshot=None):
+    """
+    Stream every row of a model, soft-deleted ones included, into its own
+    compressed NDJSON file and return its manifest entry.
+    """
+    model = apps.get_model(label)
+    filename = label + EXTENSIONS[compression]
+    path = os.path.join(directory, filename)
+    # Many-to-many fields are left to the through tables
+    fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+
+    with _snapshot(using, snapshot):
+        rows = _Counted(model._base_manager.using(using).order_by('pk').iterator(chunk_size=chunk_size))
+        with open_compressed(path, 'wt', compression) as stream:
+            serializers.serialize('jsonl', rows, stream=stream, fields=fields, cls=BackupJSONEncoder)
+
+    return {
+        'model': label,
+        'file': filename,
+        'rows': rows.count,
+        'bytes': os.path.getsize(path),
+        'sha256': file_sha256(path),
+    }
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise BackupError(f"{directory} has no {MANIFEST}")
+    if manifest.get('format') != FORMAT or manifest.get('version', 0) > VERSION:
+        raise BackupError(f"{directory} is not a backup this version can restore")
+    return manifest
+
+
+def dependency_order(labels):
+    """
+    Sort model labels so every model comes after the models its foreign
+    keys point to. Through tables follow both of their ends.
+    """
+    models = {label: apps.get_model(label) for label in labels}
+    by_model = {model: label for label, model in models.items()}
+    parents = {
+        label: {
+            by_model[field.related_model] for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in by_model and field.related_model is not model
+        }
+        for label, model in models.items()
+    }
+
+    ordered, placed = [], set()
+    while len(ordered) < len(labels):
+        ready = [label for label in labels if label not in placed and parents[label] <= placed]
+        if not ready:
+            cycle = sorted(set(labels) - placed)
+            raise BackupError(f"Foreign keys form a cycle between {', '.join(cycle)}")
+        ordered.extend(ready)
+        placed.update(ready)
+    return ordered
+
+
+def flush_tables():
+    """Empty every table of the project without running deletion signals."""
+    tables = connection.introspection.django_table_names(only_existing=True, include_views=False)
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, allow_cascade=True))
+
+
+def reset_sequences(models):
+    """Move auto-increment sequences past the restored primary keys."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class Checkpoint:
+    """
+    Progress of a restore: models fully restored, and the one in progress.
+    Rows of that model already in the database are recognised by their
+    primary key, so a batch committed right before a crash is not inserted
+    twice.
+    """
+
+    def __init__(self, path, backup_id):
+        self.path = path
+        self.backup_id = backup_id
+        self.done = []
+        self.current = None
+
+    @classmethod
+    def load(cls, path, backup_id):
+        checkpoint = cls(path, backup_id)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get('backup') != backup_id:
+            raise BackupError(f"{path} belongs to another backup")
+        checkpoint.done = data['done']
+        checkpoint.current = data.get('current')
+        return checkpoint
+
+    def save(self):
+        data = {'backup': self.backup_id, 'done': self.done, 'current': self.current}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def start(self, label):
+        self.current = label
+        self.save()
+
+    def finish(self, label):
+        self.done.append(label)
+        self.current = None
+        self.save()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def restore_objects(model, objects, batch_size=2000, resume=False):
+    """
+    Bulk insert instances of one model in batches, each in its own
+    transaction. With ``resume``, instances whose primary key is not past
+    the highest one already stored are skipped and any row that still
+    conflicts is ignored. Returns rows sent to the database.
+    """
+    last_pk = model._base_manager.aggregate(last=Max('pk'))['last'] if resume else None
+    inserted = 0
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            model._base_manager.bulk_create(batch, batch_size=batch_size, ignore_conflicts=resume)
+        return len(batch)
+
+    with _stored_timestamps(model):
+        for obj in objects:
+            if last_pk is not None and obj.pk is not None and obj.pk <= last_pk:
+                continue
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                inserted += flush()
+                batch = []
+        if batch:
+            inserted += flush()
+    return inserted
+
+
+@contextlib.contextmanager
+def _stored_timestamps(model):
+    """Keep the backed-up values of ``auto_now``/``auto_now_add`` fields instead of stamping new ones."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def read_model(directory, entry):
+    """Stream the instances stored in one backup file, after checking it is intact."""
+    path = os.path.join(directory, entry['file'])
+    if file_sha256(path) != entry['sha256']:
+        raise BackupError(f"{entry['file']} does not match its checksum in the manifest")
+    with open_compressed(path, 'rt', _compression_of(entry['file'])) as stream:
+        for deserialized in serializers.deserialize('jsonl', stream):
+            yield deserialized.object
+
+
+def _compression_of(filename):
+    for compression, extension in EXTENSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    raise BackupError(f"Unknown backup file type: {filename}")
+
+
+def read_legacy(path):
+    """
+    Instances from a single-file JSON backup (the format ``backupdb`` used
+    to write) grouped by model label, with many-to-many relations turned into
+    through-table rows. The file is one JSON array, so it is loaded whole.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    groups = {}
+    for deserialized in serializers.deserialize('python', data, ignorenonexistent=True):
+        obj = deserialized.object
+        groups.setdefault(obj._meta.label_lower, []).append(obj)
+        for name, pks in (deserialized.m2m_data or {}).items():
+            field = obj._meta.get_field(name)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            groups.setdefault(through._meta.label_lower, []).extend(
+                through(**{f'{source}_id': obj.pk, f'{target}_id': pk}) for pk in pks
+            )
+    return groups
+
+
+def init_worker():
+    import django
+    django.setup()
@@ -1,30 +1,95 @@
 import json
+import multiprocessing
 import os
-from django.core.management.base import BaseCommand
-from django.core.serializers import serialize
-from django.apps import apps
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.timezone import now
+
+from bookmyshow.db import lift_statement_timeout
+from users.backup import (
+    EXTENSIONS, FORMAT, MANIFEST, VERSION, BackupError, backup_models, check_compression, dump_model, export_snapshot,
+    init_worker,
+)
+
 
 class Command(BaseCommand):
-    help = "Backup all data to a JSON file using UTF-8 encoding"
+    help = "Back up every table as compressed NDJSON files, one per model, with a checksummed manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Backup directory (default: db_backup_<timestamp>)")
+        parser.add_argument('--compress', choices=sorted(EXTENSIONS), default='gzip', help="Compression format")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched from the database at a time")
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help="Models dumped in parallel (1 dumps in this process)")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to back up")
 
     def handle(self, *args, **kwargs):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"db_backup_{timestamp}.json"
+        try:
+            check_compression(kwargs['compress'])
+        except BackupError as e:
+            raise CommandError(f"❌ {e}")
+
+        directory = kwargs['output'] or f"db_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if os.path.exists(os.path.join(directory, MANIFEST)):
+            raise CommandError(f"❌ {directory} already holds a backup")
+        os.makedirs(directory, exist_ok=True)
+
+        using = kwargs['database']
+        # Workers spawned below inherit this through the environment
+        lift_statement_timeout(using)
+        options = {
+            'directory': directory,
+            'compression': kwargs['compress'],
+            'chunk_size': kwargs['chunk_size'],
+            'using': using,
+        }
+        labels = [model._meta.label_lower for model in backup_models()]
+
+        # On PostgreSQL every worker reads the snapshot of this transaction,
+        # so the backup is consistent across tables
+        with transaction.atomic(using=using) if connections[using].vendor == 'postgresql' else nullcontext():
+            options['snapshot'] = export_snapshot(using)
+            entries = self._dump(labels, options, kwargs['workers'])
+
+        manifest = {
+            'format': FORMAT,
+            'version': VERSION,
+            'created_at': now().isoformat(),
+            'database': connections[using].vendor,
+            'compression': kwargs['compress'],
+            'consistent': options['snapshot'] is not None,
+            'models': sorted(entries, key=lambda entry: labels.index(entry['model'])),
+        }
+        with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        rows = sum(entry['rows'] for entry in entries)
+        self.stdout.write(self.style.SUCCESS(f"\n🎉 Backup completed: {directory} ({rows} rows in {len(entries)} tables)"))
 
-        all_models = apps.get_models()
-        all_data = []
+    def _dump(self, labels, options, workers):
+        entries = []
+        if workers <= 1:
+            # Already inside the snapshot's transaction
+            options = {**options, 'snapshot': None}
+            for label in labels:
+                entries.append(self._done(dump_model(label, **options)))
+            return entries
 
-        for model in all_models:
-            try:
-                data = serialize('json', model.objects.all())
-                all_data += json.loads(data)
-                self.stdout.write(self.style.SUCCESS(f"✔ Serialized {model.__name__}"))
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f"⚠ Skipped {model.__name__}: {e}"))
+        # Spawned workers open their own connections; don't hand them ours
+        if options['snapshot'] is None:
+            connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker) as pool:
+            futures = [pool.submit(dump_model, label, **options) for label in labels]
+            for future in as_completed(futures):
+                entries.append(self._done(future.result()))
+        return entries
 
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(all_data, f, indent=2, ensure_ascii=False)
+    def _done(self, entry):
+        self.stdout.write(self.style.SUCCESS(f"✔ Dumped {entry['model']} ({entry['rows']} rows)"))
+        return entry
 
-        self.stdout.write(self.style.SUCCESS(f"\n🎉 Backup completed: {output_file}"))
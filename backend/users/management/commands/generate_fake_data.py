@@ -11,6 +11,7 @@ from faker import Faker
 from datetime import datetime
 
 from movies.models import CastMember, Movie, Review
+from movies.ratings import recompute_ratings
 from theaters.models import Theater, Screen, Show
 
 User = get_user_model()
@@ -177,6 +178,7 @@ class Command(BaseCommand):
                     )
                     reviewed.add(key)
                     stats["reviews"] += 1
+        recompute_ratings()
 
         # --- Final Log
         self.stdout.write(self.style.SUCCESS("✅ Fake data generation complete."))
@@ -1,38 +1,107 @@
 import os
-import json
+import time
+
+from django.apps import apps
 from django.core.management.base import BaseCommand, CommandError
-from django.core.serializers import deserialize
-from django.db import transaction
+
+from bookmyshow.db import lift_statement_timeout
+from movies.cache import bump_catalog_version
+from movies.ratings import recompute_ratings
+from movies.search import rebuild_index
+from theaters.showtimes import rebuild_showtimes
+from users.backup import (
+    BackupError, Checkpoint, dependency_order, file_sha256, flush_tables, load_manifest, read_legacy, read_model,
+    reset_sequences, restore_objects,
+)
+
+# Derived tables rebuilt from their sources when a backup has no copy of them
+DERIVED = {
+    'theaters.showtime': rebuild_showtimes,
+    'movies.searchkey': rebuild_index,
+}
 
 
 class Command(BaseCommand):
-    help = "Restore database from a JSON backup file"
+    help = "Restore the database from a backupdb directory (or a legacy JSON backup file)"
 
     def add_arguments(self, parser):
-        parser.add_argument('filepath', type=str, help="Path to the backup JSON file")
+        parser.add_argument('filepath', type=str, help="Backup directory, or a JSON file from the old backupdb")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows inserted per transaction")
+        parser.add_argument('--checkpoint', help="Progress file (default: next to the backup)")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over")
+        parser.add_argument('--no-input', action='store_false', dest='interactive',
+                            help="Don't ask for confirmation")
 
     def handle(self, *args, **kwargs):
-        filepath = kwargs['filepath']
+        filepath = kwargs['filepath'].rstrip('/\\')
 
         if not os.path.exists(filepath):
             raise CommandError(f"❌ File not found: {filepath}")
 
-        confirm = input(f"⚠ This will overwrite existing data. Are you sure you want to continue? [yes/no]: ")
-        if confirm.strip().lower() != 'yes':
+        try:
+            self._restore(filepath, kwargs)
+        except BackupError as e:
+            raise CommandError(f"❌ {e}")
+
+    def _restore(self, filepath, kwargs):
+        legacy = os.path.isfile(filepath)
+        if legacy:
+            self.stdout.write(self.style.WARNING("⏳ Reading legacy JSON backup..."))
+            groups = read_legacy(filepath)
+            backup_id = file_sha256(filepath)
+            sources = {label: (lambda label=label: groups.pop(label)) for label in groups}
+            checkpoint_path = kwargs['checkpoint'] or filepath + '.checkpoint'
+        else:
+            manifest = load_manifest(filepath)
+            backup_id = manifest['created_at']
+            sources = {}
+            for entry in manifest['models']:
+                try:
+                    apps.get_model(entry['model'])
+                except LookupError:
+                    self.stdout.write(self.style.WARNING(f"⚠ Skipped {entry['model']}: no such model"))
+                    continue
+                sources[entry['model']] = lambda entry=entry: read_model(filepath, entry)
+            checkpoint_path = kwargs['checkpoint'] or os.path.join(filepath, 'restore.checkpoint')
+
+        order = dependency_order(list(sources))
+
+        checkpoint = None if kwargs['restart'] else Checkpoint.load(checkpoint_path, backup_id)
+        if checkpoint:
+            question = f"⚠ Resume the interrupted restore ({len(checkpoint.done)} of {len(order)} tables done)?"
+        else:
+            question = "⚠ This will overwrite existing data. Are you sure you want to continue?"
+        if kwargs['interactive'] and input(f"{question} [yes/no]: ").strip().lower() != 'yes':
             self.stdout.write(self.style.WARNING("❌ Restore cancelled."))
             return
 
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        lift_statement_timeout()
+        started = time.perf_counter()
+        if not checkpoint:
+            flush_tables()
+            checkpoint = Checkpoint(checkpoint_path, backup_id)
+            checkpoint.save()
 
-            self.stdout.write(self.style.WARNING("⏳ Restoring data..."))
+        for label in order:
+            if label in checkpoint.done:
+                continue
+            resume = checkpoint.current == label
+            checkpoint.start(label)
+            rows = restore_objects(apps.get_model(label), sources[label](), kwargs['batch_size'], resume)
+            checkpoint.finish(label)
+            self.stdout.write(self.style.SUCCESS(f"✔ Restored {label} ({rows} rows)"))
 
-            with transaction.atomic():
-                for obj in deserialize('json', json.dumps(data)):
-                    obj.save()
+        reset_sequences([apps.get_model(label) for label in order])
 
-            self.stdout.write(self.style.SUCCESS("🎉 Database restore successful."))
+        for label, rebuild in DERIVED.items():
+            if label not in sources:
+                rebuild()
+                self.stdout.write(self.style.SUCCESS(f"✔ Rebuilt {label}"))
+        if legacy:
+            # Old backups predate the per-movie review aggregates
+            recompute_ratings()
+            self.stdout.write(self.style.SUCCESS("✔ Recomputed movie ratings"))
+        bump_catalog_version()
 
-        except Exception as e:
-            raise CommandError(f"❌ Failed to restore data: {e}")
+        checkpoint.remove()
+        self.stdout.write(self.style.SUCCESS(f"\n🎉 Database restore successful in {time.perf_counter() - started:.1f}s."))
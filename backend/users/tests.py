@@ -1,3 +1,106 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+from django.utils.timezone import now
+
+from bookings import availability
+from bookings.models import BookedSeat, Booking, Seat
+from movies.models import Movie, Review
+from movies.ratings import review_added
+from theaters.models import Screen, Show, Showtime, Theater
+from .models import User
+
+
+class BackupRestoreTests(TransactionTestCase):
+    """backupdb then restoredb gives back the same rows, ids and timestamps."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='x', role='theater_owner', phone='400')
+        self.user = User.objects.create_user('viewer', password='x', role='user', phone='401')
+        self.movie = Movie.objects.create(
+            title='Film', description='d', language='Hindi', genre='Drama', duration=120, rating=8,
+            release_date='2020-01-01', created_by=self.owner,
+        )
+        theater = Theater.objects.create(name='Cinema', location='Mumbai, Mall', created_by=self.owner)
+        screen = Screen.objects.create(name='Screen 1', theater=theater, created_by=self.owner)
+        self.show = Show.objects.create(screen=screen, movie=self.movie, show_time=now() + timedelta(days=1),
+                                        created_by=self.owner)
+        self.review = Review.objects.create(movie=self.movie, user=self.user, rating=4)
+        review_added(self.review)
+
+        seat = Seat.objects.filter(screen=screen).order_by('id').first()
+        self.booking = Booking.objects.create(user=self.user, show=self.show, total_price=350)
+        BookedSeat.objects.create(show=self.show, seat=seat, booking=self.booking)
+        self.booking.seats.add(seat)
+
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'backup')
+        availability.invalidate_all()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        availability.invalidate_all()
+
+    def snapshot(self):
+        return {
+            'users': list(User.objects.order_by('id').values('id', 'username', 'password', 'date_joined')),
+            'movies': list(Movie.all_objects.order_by('id').values()),
+            'reviews': list(Review.all_objects.order_by('id').values()),
+            'seats': list(Seat.objects.order_by('id').values_list('id', 'seat_number')),
+            'bookings': list(Booking.objects.order_by('id').values()),
+            'booked_seats': list(BookedSeat.objects.order_by('id').values_list('show_id', 'seat_id', 'booking_id')),
+            'booking_seats': list(Booking.seats.through.objects.order_by('id').values_list('booking_id', 'seat_id')),
+            'showtimes': list(Showtime.objects.order_by('show_id').values_list('show_id', 'city')),
+        }
+
+    def backup(self, *args):
+        call_command('backupdb', '--output', self.output, '--workers', '1', *args, stdout=StringIO())
+
+    def restore(self):
+        call_command('restoredb', self.output, '--no-input', stdout=StringIO())
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        self.backup()
+
+        with open(os.path.join(self.output, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        rows = {entry['model']: entry['rows'] for entry in manifest['models']}
+        self.assertEqual(rows['bookings.booking'], 1)
+        self.assertEqual(rows['movies.review'], 1)
+
+        # Everything after the backup is rolled back by the restore
+        self.movie.title = 'Changed'
+        self.movie.save()
+        self.booking.delete()
+        User.objects.create_user('latecomer', password='x', phone='402')
+
+        self.restore()
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'restore.checkpoint')))
+
+        # Sequences continue after the restored ids
+        later = User.objects.create_user('after', password='x', phone='403')
+        self.assertGreater(later.id, max(user['id'] for user in before['users']))
+
+    def test_restore_brings_back_review_aggregates(self):
+        before = self.snapshot()
+        self.backup()
+        Review.all_objects.all().delete()
+        Movie.all_objects.update(review_count=0, review_rating_sum=0, review_count_4=0)
+
+        self.restore()
+        self.assertEqual(self.snapshot(), before)
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.review_count, self.movie.review_rating_sum), (1, 4))
+
+    def test_refuses_to_overwrite_a_backup(self):
+        self.backup()
+        with self.assertRaises(CommandError):
+            self.backup()
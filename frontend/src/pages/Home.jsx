@@ -11,7 +11,7 @@ function Home() {
     const fetchMovies = async () => {
       try {
         const res = await api.movie.getAll(); // GET /api/movies/
-        setMovies(res.data);
+        setMovies(res.data.results);
       } catch (err) {
         setError("Failed to load movies.");
         console.error(err);